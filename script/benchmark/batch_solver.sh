@@ -0,0 +1,4 @@
+python -m src.benchmark.batch_solver\
+    --graphs 1000\
+    --nodes 50\
+    --batch_size 100 1000\
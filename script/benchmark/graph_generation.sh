@@ -0,0 +1,3 @@
+python -m src.benchmark.graph_generation\
+    --nodes 1000 5000 10000 100000\
+    --legacy_limit 5000\
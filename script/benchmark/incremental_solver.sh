@@ -0,0 +1,4 @@
+python -m src.benchmark.incremental_solver\
+    --nodes 2000 10000\
+    --edge_factor 10\
+    --edits 50\
@@ -0,0 +1,4 @@
+python -m src.benchmark.pareto_frontier\
+    --count 100\
+    --nodes 50\
+    --max_labels 64\
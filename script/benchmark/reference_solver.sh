@@ -0,0 +1,4 @@
+python -m src.benchmark.reference_solver\
+    --nodes 500 2000 10000\
+    --edge_factor 10\
+    --legacy_limit 20000\
@@ -0,0 +1,5 @@
+python -m src.benchmark.rule_lookup\
+    --graphs 50\
+    --nodes 50\
+    --graph_type random\
+    --repeat 3\
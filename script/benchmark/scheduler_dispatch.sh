@@ -0,0 +1,5 @@
+python -m src.benchmark.scheduler_dispatch\
+    --slow_time 20\
+    --chains 4\
+    --chain_length 10\
+    --time_scale 0.2\
@@ -1,15 +1,17 @@
 import os, sys, json
 import argparse
+import logging
 import importlib
 import multiprocessing
-from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.env.tt_env import TTEnvFactory
 from src.agent.module.runner import TTRunner
-from src.agent.module.scheduler import ParallelScheduler
+from src.agent.module.scheduler import get_scheduler, BatchScheduler, WorkerPool, SCHEDULERS
 from src.agent.module.planner import ParallelPlanner
 from src.agent.module.extractor import Extractor
 from src.agent.module.subtask import SubTTNode
 from src.utils.utils import get_model
-from src.utils.logger_config import logger, COLOR_CODES, RESET
+from src.utils.logger_config import logger, commit_logger, COLOR_CODES, RESET
+from src.utils.tracing import ChromeTracer, trace_path_for
 
 def preprocess_question(args):
     questions = []
@@ -24,7 +26,10 @@ def preprocess_question(args):
             partial_results = json.load(f)
     else:
         partial_results = []
-    partial_results = [result for result in partial_results if result['plan'] is not None]
+    # a plan the batch scheduler could not run is planned again, as a sequential failure would be
+    partial_results = [
+        result for result in partial_results if result['plan'] is not None and 'schedule_error' not in result
+    ]
     processed_questions = set(result['question']['id'] for result in partial_results)
     for question in data:
         if question['id'] not in processed_questions:
@@ -37,13 +42,23 @@ def main():
     parser.add_argument("--task", type=str, required=True, help="The task to run.")
     parser.add_argument('--template', type=str, required=True, help='The template to use.')
     parser.add_argument("--model", type=str, required=True, help="The model to use.")
-    parser.add_argument("--scheduler", type=str, required=True, help="The scheduler to use.")
+    parser.add_argument("--scheduler", type=str, required=True, choices=list(SCHEDULERS), help="The scheduler to use.")
+    parser.add_argument("--max_workers", type=int, help="Run at most this many subtasks at once, highest critical path first.", default=None)
+    parser.add_argument("--pool_size", type=int, help="Number of long-lived workers for the pool scheduler and batch mode.", default=None)
+    parser.add_argument("--task_timeout", type=float, help="Kill and retry a subtask attempt that runs longer than this many seconds.", default=None)
+    parser.add_argument("--heartbeat_timeout", type=float, help="Kill and retry a subtask process whose heartbeat stops for this many seconds, counted from its first beat. Only catches frozen processes; use --task_timeout for subtasks stuck in their own code.", default=None)
+    parser.add_argument("--task_retries", type=int, help="Retries per failed subtask before the whole plan fails.", default=0)
+    parser.add_argument("--retry_backoff", type=float, help="Initial backoff in seconds between subtask retries; doubles each attempt.", default=1.0)
+    parser.add_argument("--batch_size", type=int, help="Schedule the valid plans of this many questions together on one shared executor (--scheduler threads or pool).", default=1)
     parser.add_argument("--extractor", type=bool or str, help="Whether to use the extractor and the model to extract rules.", default=False)
     parser.add_argument("--max_retry", type=int, help="The maximum number of retries.", default=3)
     parser.add_argument("--test_case", type=str, help="The test case to use.", default=None)
     parser.add_argument("--output_dir", type=str, help="The output file to write to.", default=None)
+    parser.add_argument("--log_commits", action="store_true", help="Log every subtask commit to the environment.")
+    parser.add_argument("--trace", action="store_true", help="Write a Chrome trace of scheduler events next to the output file.")
     parser.add_argument("--planner_mode", type=str, default="legacy", help="Planner mode: legacy | tool_aware")
     parser.add_argument("--tool_registry", type=str, default=None, help="Path to tool registry JSON for tool-aware planning.")
+    parser.add_argument("--tool_concurrency", type=int, default=4, help="Ready tool-aware tasks run at once per handoff.")
     parser.add_argument(
         "--worker_mode",
         type=str,
@@ -52,6 +67,13 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.log_commits:
+        commit_logger.setLevel(logging.DEBUG)
+    if args.batch_size > 1 and args.planner_mode != "tool_aware":
+        if args.scheduler not in ("threads", "pool"):
+            parser.error("--batch_size > 1 runs plans on a shared executor; use --scheduler threads or pool")
+        if args.task_timeout or args.heartbeat_timeout:
+            parser.error("--task_timeout and --heartbeat_timeout need one process per subtask; use --batch_size 1")
     args.test_file = f"data/dev/test/{args.test_case}.json"
     args.output_file = args.output_dir + "/" if args.output_dir and not args.output_dir.endswith("/") else args.output_dir
     args.output_file = args.output_file + args.test_case if args.output_dir else None
@@ -69,6 +91,9 @@ def main():
     logger.info(f"Using extractor: {args.extractor}")
     logger.info(f"Output file: {args.output_file}")
     logger.info(f"Planner mode: {args.planner_mode}")
+
+    tracer = ChromeTracer() if args.trace else None
+    trace_file = trace_path_for(args.output_file) if tracer and args.output_file else None
     
     model = get_model(args.model)
     tool_registry = None
@@ -81,10 +106,12 @@ def main():
         if not args.tool_registry:
             raise ValueError("tool_registry is required when planner_mode is 'tool_aware'")
         tool_registry = ToolRegistry.from_file(args.tool_registry)
-        tool_worker = ToolAwareWorker(tool_registry, ToolRuntime(tool_registry))
+        tool_worker = ToolAwareWorker(tool_registry, ToolRuntime(tool_registry), tracer=tracer, max_concurrency=args.tool_concurrency)
         logger.info(f"Loaded tool registry with {len(tool_registry.list_tool_names())} tools from {args.tool_registry}")
     
     multiprocessing.set_start_method('spawn')
+    worker_pool = None
+    batch_scheduler = None
     
     try:
         def save_results(partial_results, output_file):
@@ -92,10 +119,51 @@ def main():
                 json.dump(partial_results, f, ensure_ascii=False, indent=4)
         
         partial_results, questions = preprocess_question(args)
+        scheduler_kwargs = {
+            "max_workers": args.max_workers,
+            "tracer": tracer,
+            "task_timeout": args.task_timeout,
+            "heartbeat_timeout": args.heartbeat_timeout,
+            "max_task_retries": args.task_retries,
+            "retry_backoff": args.retry_backoff,
+        }
+        if args.scheduler == "pool" and args.planner_mode != "tool_aware":
+            worker_pool = WorkerPool(TTRunner(None, None), max_workers=args.pool_size)
+            scheduler_kwargs["pool"] = worker_pool
+            logger.info(f"Started worker pool with {worker_pool.workers} workers in {worker_pool.startup_seconds:.3f}s")
+        pending = []
+        env_factory = TTEnvFactory()
+        if args.batch_size > 1 and args.planner_mode != "tool_aware":
+            batch_scheduler = BatchScheduler(
+                TTRunner(None, None), pool=worker_pool, max_workers=args.pool_size, tracer=tracer,
+                scheduler_kwargs={key: value for key, value in scheduler_kwargs.items() if key not in ("tracer", "pool")},
+            )
+
+        def flush_batch():
+            if not pending:
+                return
+            outcomes = batch_scheduler.run(
+                [(subtasks, env) for _, subtasks, env in pending],
+                labels=[record['question'].get('id') for record, _, _ in pending],
+            )
+            for (record, _, _), plan_scheduler, outcome in zip(pending, batch_scheduler.plans, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Error scheduling question {record['question'].get('id')}: {COLOR_CODES['RED']}{outcome}{RESET}")
+                    # a rerun on the same output file picks the question up again instead of treating it as done
+                    record['schedule_error'] = str(outcome)
+                    continue
+                record['result'] = outcome
+                record['schedule'] = plan_scheduler.report()
+            pending.clear()
+
         for question in questions:
+            if tracer:
+                tracer.context["question"] = question.get("id")
             retry_count = 0
             plan = None
             all_failed_plans = []
+            schedule = None
+            deferred = None
             extractor = None
             if isinstance(args.extractor, str):
                 if args.extractor == args.model:
@@ -184,20 +252,27 @@ def main():
                             raise ValueError(f"Unsupported task: {args.task}")
 
                         if "question" in question:
-                            env = TTEnv(question['question'])
+                            env = env_factory.create(question['question'], question.get('id'))
                         else:
-                            env = TTEnv(task)
+                            env = env_factory.create(task)
 
                         prompt = prompt.replace("\'", "\"")
 
                         runner = TTRunner(None, None)
                         node_type = SubTTNode
                         planner = ParallelPlanner(model, env)
-                        scheduler = ParallelScheduler(runner, env)
+                        scheduler = get_scheduler(args.scheduler, runner, env, **scheduler_kwargs)
 
                         subtasks, plan, valid, failed_plans = planner.plan(prompt, node_type, args.max_retry)
+                        if valid and batch_scheduler is not None:
+                            result = None
+                            deferred = (subtasks, env)
+                            break
                         if valid:
                             result = scheduler.run(subtasks)
+                            schedule = scheduler.report()
+                            if args.max_workers:
+                                logger.info(f"Makespan in rule time with {args.max_workers} workers: {COLOR_CODES['CYAN']}{schedule['makespan']}{RESET}, unconstrained: {COLOR_CODES['CYAN']}{schedule['unconstrained_makespan']}{RESET} (wall clock: {schedule['wall_clock_seconds']}s)")
                             break
                         retry_count += 1
                         result = None
@@ -206,7 +281,8 @@ def main():
                         all_failed_plans.append(plan)
                 except Exception as e:
                     for process in multiprocessing.active_children():
-                        process.terminate()
+                        if worker_pool is None or not worker_pool.owns(process):
+                            process.terminate()
                     logger.error(f"Error1: {COLOR_CODES['RED']}{e}{RESET}")
                     retry_count += 1
                     result = None
@@ -216,10 +292,31 @@ def main():
             partial_results.append({'question': question, 'failed_plans': all_failed_plans, 'plan': plan, 'result': result})
             if args.extractor:
                 partial_results[-1]['model_rules'] = task
+            if schedule is not None:
+                partial_results[-1]['schedule'] = schedule
+            if env is not None and all_failed_plans:
+                try:
+                    partial_results[-1]['failed_plan_scores'] = env.evaluate_plans(all_failed_plans)
+                except Exception as e:
+                    logger.error(f"Error scoring failed plans: {COLOR_CODES['RED']}{e}{RESET}")
+            if deferred is not None:
+                pending.append((partial_results[-1], *deferred))
+                if len(pending) >= args.batch_size:
+                    flush_batch()
+            if args.output_file and not pending:
+                save_results(partial_results, args.output_file)
+            if trace_file:
+                tracer.dump(trace_file)
+        if pending:
+            flush_batch()
             if args.output_file:
                 save_results(partial_results, args.output_file)
+            if trace_file:
+                tracer.dump(trace_file)
         if not args.output_file:
             logger.info(f"Results: {COLOR_CODES['CYAN']}{partial_results}{RESET}")
+        if worker_pool is not None:
+            logger.info(f"Worker pool overhead saved: {COLOR_CODES['CYAN']}{worker_pool.report()}{RESET}")
     
 
     except KeyboardInterrupt:
@@ -229,6 +326,11 @@ def main():
         sys.exit(0)
     except Exception as e:
         logger.error(f"{COLOR_CODES['RED']}Error2: {e}{RESET}")
+    finally:
+        if batch_scheduler is not None:
+            batch_scheduler.shutdown()
+        if worker_pool is not None:
+            worker_pool.shutdown()
 
 if __name__ == "__main__":
     main()
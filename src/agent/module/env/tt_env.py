@@ -1,79 +1,406 @@
+import hashlib
 import json
-from typing import List, Dict, Set
+import logging
+from array import array
+from collections import OrderedDict, deque
+from typing import List, Dict, NamedTuple, Set
 from src.agent.module.subtask import SubTTNode
+from src.utils.logger_config import commit_logger
+
+class CommitRecord(NamedTuple):
+    name: str
+    time: int
+    current_time: int
+
+    def render(self) -> str:
+        return f"{self.name} successfully committed. Time: {self.time}, Current time: {self.current_time}"
 
 class TTEnv:
-    def __init__(self, config: dict | str | None):
+    """Replay subtasks against a rule set and track when each material is first available.
+
+    Material names are interned to dense ids at load time. Availability is an
+    int bitset and earliest times live in a preallocated ``array`` indexed by
+    id; an entry is only meaningful while its availability bit is set, so
+    ``reset`` just restores the initial masks.
+
+    Commits are journaled as ``CommitRecord``s in a ring buffer holding the
+    latest ``journal_size`` entries; ``log`` renders them to text on demand.
+    """
+    def __init__(self, config: dict | str | None, journal_size: int = 10000):
         if config is None:
             config = {}
         if isinstance(config, str):
             config = json.loads(config)
         self.rules = config.get("rules", [])
+        self.rule_index = self._build_rule_index(self.rules)
         self.initial_sources = config.get("initial_source", [])
-        self.available_materials: Set[str] = set(self.initial_sources)
-        self.synthesized_materials: Set[str] = set()
         self.target = config.get("target", "")
-        self.material_earliest_time: Dict[str, int] = {material: 0 for material in self.initial_sources}
-        self.total_cost = 0
-        self.log = ""
-    
+
+        self.materials: List[str] = []
+        self.material_ids: Dict[str, int] = {}
+        # forks share the intern tables with their template until they intern a new name
+        self._shared_tables = False
+        self._rule_ids = [self._compile(rule["source"], rule["target"]) for rule in self.rules]
+        self._initial_ids = self._intern_all(self.initial_sources)
+        if self.target:
+            self._intern(self.target)
+        self._initial_mask = self._mask(self._initial_ids)
+
+        integral = all(isinstance(rule.get("time", 0), int) for rule in self.rules)
+        self._earliest = array('q' if integral else 'd', bytes(8 * len(self.materials)))
+        self._serial = 0
+        self.journal: deque = deque(maxlen=journal_size)
+        self.reset()
+
+    def fork(self, journal_size: int = 10000) -> "TTEnv":
+        """A fresh env over the same rules, sharing everything that commits never change."""
+        env = object.__new__(TTEnv)
+        env.rules = self.rules
+        env.rule_index = self.rule_index
+        env.initial_sources = self.initial_sources
+        env.target = self.target
+        env.materials = self.materials
+        env.material_ids = self.material_ids
+        env._shared_tables = True
+        env._rule_ids = self._rule_ids
+        env._initial_ids = self._initial_ids
+        env._initial_mask = self._initial_mask
+        env._earliest = array(self._earliest.typecode, bytes(8 * len(self.materials)))
+        env._serial = 0
+        env.journal = deque(maxlen=journal_size)
+        env.reset()
+        return env
+
+    def _intern(self, material: str) -> int:
+        material_id = self.material_ids.get(material)
+        if material_id is None:
+            if self._shared_tables:
+                self.materials, self.material_ids = list(self.materials), dict(self.material_ids)
+                self._shared_tables = False
+            material_id = self.material_ids[material] = len(self.materials)
+            self.materials.append(material)
+            if hasattr(self, "_earliest"):
+                self._earliest.append(0)
+        return material_id
+
+    def _intern_all(self, materials) -> tuple:
+        return tuple(self._intern(material) for material in materials)
+
+    def _compile(self, source, target) -> tuple:
+        """(source ids, target ids, source mask, target mask) for one reaction."""
+        source_ids, target_ids = self._intern_all(source), self._intern_all(target)
+        return source_ids, target_ids, self._mask(source_ids), self._mask(target_ids)
+
+    @staticmethod
+    def _mask(material_ids) -> int:
+        mask = 0
+        for material_id in material_ids:
+            mask |= 1 << material_id
+        return mask
+
+    def _decode(self, mask: int) -> Set[str]:
+        materials = set()
+        while mask:
+            low = mask & -mask
+            materials.add(self.materials[low.bit_length() - 1])
+            mask ^= low
+        return materials
+
+    @property
+    def available_materials(self) -> Set[str]:
+        return self._decode(self._available)
+
+    @property
+    def synthesized_materials(self) -> Set[str]:
+        return self._decode(self._synthesized)
+
+    @property
+    def material_earliest_time(self) -> Dict[str, int]:
+        return {
+            material: self._earliest[material_id]
+            for material_id, material in enumerate(self.materials)
+            if self._available >> material_id & 1
+        }
+
     def reset(self):
-        self.available_materials = set(self.initial_sources)
-        self.synthesized_materials = set()
-        self.material_earliest_time = {material: 0 for material in self.initial_sources}
+        self._available = self._initial_mask
+        self._synthesized = 0
+        for material_id in self._initial_ids:
+            self._earliest[material_id] = 0
         self.total_cost = 0
-        self.log = ""
+        self.journal.clear()
+        self._commits = 0
+        # (material id, previous time) for each earliest time lowered in place while a checkpoint is held
+        self._undo: List[tuple] = []
+        # serials of the checkpoints that are still restorable, oldest first
+        self._checkpoints: List[int] = []
+
+    def checkpoint(self) -> tuple:
+        """Return a token that ``rollback`` can restore the current state from.
+
+        Taking a checkpoint is O(1): the masks and cost are immutable values,
+        and earliest times are only recorded when a later commit lowers one.
+        Commits made while no checkpoint is held record nothing, so call
+        ``release`` once a checkpoint is no longer needed.
+        """
+        self._serial += 1
+        self._checkpoints.append(self._serial)
+        return (
+            self._serial, len(self._checkpoints) - 1,
+            len(self._undo), self._available, self._synthesized, self.total_cost, self._commits,
+        )
+
+    def rollback(self, token: tuple):
+        """Undo every commit made since ``token`` was taken, in O(changed materials)."""
+        serial, depth, undo_length, available, synthesized, total_cost, commits = token
+        if depth >= len(self._checkpoints) or self._checkpoints[depth] != serial:
+            raise ValueError("Checkpoint is stale: the env was reset, rolled back past it or released it.")
+        # checkpoints taken after this one describe states that no longer exist
+        del self._checkpoints[depth + 1:]
+        earliest, undo = self._earliest, self._undo
+        while len(undo) > undo_length:
+            material_id, previous = undo.pop()
+            earliest[material_id] = previous
+        # materials that became available since the checkpoint are masked out again
+        self._available = available
+        self._synthesized = synthesized
+        self.total_cost = total_cost
+        for _ in range(min(self._commits - commits, len(self.journal))):
+            self.journal.pop()
+        self._commits = commits
+
+    def release(self, token: tuple):
+        """Drop ``token`` and every checkpoint taken after it; a no-op if it is already stale."""
+        serial, depth = token[:2]
+        if depth < len(self._checkpoints) and self._checkpoints[depth] == serial:
+            del self._checkpoints[depth:]
+        if not self._checkpoints:
+            self._undo.clear()
+
+    @property
+    def log(self) -> str:
+        """The journaled commits as text, one line per commit."""
+        return "".join(record.render() + "\n" for record in self.journal)
+
+    @staticmethod
+    def _rule_key(source, target):
+        return frozenset(source), frozenset(target)
+
+    @classmethod
+    def _build_rule_index(cls, rules: List[dict]) -> Dict[tuple, int]:
+        """Map (sources, targets), ignoring order, to the first rule that declares them."""
+        index = {}
+        for i, rule in enumerate(rules):
+            index.setdefault(cls._rule_key(rule["source"], rule["target"]), i)
+        return index
+
+    def _match_rule(self, sub_node: SubTTNode) -> int | None:
+        if sub_node.perform_rule_indx is not None:
+            return sub_node.perform_rule_indx
+        return self.rule_index.get(self._rule_key(sub_node.source, sub_node.target))
     
+    def _apply_rule(self, sub_node: SubTTNode) -> int | None:
+        """Copy the matching rule's time and cost onto the subtask and return its index, or None."""
+        rule_indx = self._match_rule(sub_node)
+        if rule_indx is None:
+            return None
+        rule = self.rules[rule_indx]
+        sub_node.time = rule.get("time", 0)
+        sub_node.cost = rule.get("cost", 0)
+        return rule_indx
+
     def is_valid_sub_node(self, sub_node: SubTTNode) -> bool:
-        if sub_node.perform_rule_indx is not None:
-            sub_node.time = self.rules[sub_node.perform_rule_indx].get("time", 0)
-            sub_node.cost = self.rules[sub_node.perform_rule_indx].get("cost", 0)
-            return True
-        for rule in self.rules:
-            if sorted(rule["target"]) == sorted(sub_node.target):
-                if sorted(rule["source"]) == sorted(sub_node.source):
-                    sub_node.time = rule.get("time", 0)
-                    sub_node.cost = rule.get("cost", 0)
-                    return True
-        return False
+        return self._apply_rule(sub_node) is not None
     
     def commit(self, sub_node: SubTTNode):
         if sub_node.source is None or sub_node.target is None:
             sub_node.source = self.rules[sub_node.perform_rule_indx]["source"]
             sub_node.target = self.rules[sub_node.perform_rule_indx]["target"]
             
-        if not self.is_valid_sub_node(sub_node):            
+        rule_indx = self._apply_rule(sub_node)
+        if rule_indx is None:
             raise ValueError(f"Reaction {sub_node.name} does not match any rule.")
+
+        if sub_node.perform_rule_indx is None:
+            # matched through the index, so the rule names the same material sets
+            source_ids, target_ids, source_mask, target_mask = self._rule_ids[rule_indx]
+        else:
+            source_ids, target_ids, source_mask, target_mask = self._compile(sub_node.source, sub_node.target)
         
-        for material in sub_node.source:
-            if material not in self.available_materials:                
-                raise ValueError(f"Running {sub_node.name}: Source material {material} is not available.")
-        
-        self.available_materials.update(sub_node.target)
-        self.synthesized_materials.update(sub_node.target)
+        available = self._available
+        if source_mask & ~available:
+            for material in sub_node.source:
+                if not available >> self.material_ids[material] & 1:
+                    raise ValueError(f"Running {sub_node.name}: Source material {material} is not available.")
         
+        earliest = self._earliest
         current_time = 0
-        for source in sub_node.source:
-            current_time = max(current_time, self.material_earliest_time[source])
+        for source_id in source_ids:
+            current_time = max(current_time, earliest[source_id])
         current_time += sub_node.time
         
-        for target in sub_node.target:
-            if target not in self.material_earliest_time:
-                self.material_earliest_time[target] = current_time
-            else:
-                self.material_earliest_time[target] = min(self.material_earliest_time[target], current_time)
+        for target_id in target_ids:
+            if not available >> target_id & 1:
+                earliest[target_id] = current_time
+            elif current_time < earliest[target_id]:
+                if self._checkpoints:
+                    self._undo.append((target_id, earliest[target_id]))
+                earliest[target_id] = current_time
         
+        self._available |= target_mask
+        self._synthesized |= target_mask
         self.total_cost += sub_node.cost
         
-        self.log += f"{sub_node.name} successfully committed. Time: {sub_node.time}, Current time: {current_time}\n"
-        print(f"{sub_node.name} successfully committed. Time: {sub_node.time}, Current time: {current_time}")        
+        record = CommitRecord(sub_node.name, sub_node.time, current_time)
+        self.journal.append(record)
+        self._commits += 1
+        if commit_logger.isEnabledFor(logging.DEBUG):
+            commit_logger.debug(record.render())
         return current_time
     
+    def evaluate_plans(self, plans: list) -> List[dict]:
+        """Score many plans against this environment without touching its state.
+
+        A plan is a list of subtask dicts as produced by the planner (or a
+        ``{"plan": [...]}`` wrapper); anything else, such as a raw model
+        response that failed to parse, is infeasible. Subtasks are replayed in
+        dependency order and each plan gets ``feasible``, ``makespan`` (the
+        target's earliest time, or None), ``cost`` (of the subtasks that could
+        be committed) and ``error``.
+        """
+        scores = []
+        for plan in plans:
+            try:
+                scores.append(self._evaluate_plan(plan))
+            except Exception as e:
+                # model output can be malformed in ways no check anticipates; one bad plan must not sink the rest
+                scores.append(self._score(False, None, 0, f"Malformed plan: {e}"))
+        return scores
+
+    @staticmethod
+    def _score(feasible: bool, makespan, cost, error: str | None = None) -> dict:
+        return {"feasible": feasible, "makespan": makespan, "cost": cost, "error": error}
+
+    def _evaluate_plan(self, plan) -> dict:
+        if isinstance(plan, dict):
+            plan = plan.get("plan")
+        if not isinstance(plan, list):
+            return self._score(False, None, 0, "Plan is not a list of subtasks.")
+        try:
+            nodes = [SubTTNode(task) for task in plan]
+        except (KeyError, TypeError) as e:
+            return self._score(False, None, 0, f"Malformed subtask: {e}")
+
+        compiled = []
+        for node in nodes:
+            try:
+                rule_indx = self._match_rule(node)
+            except TypeError:
+                rule_indx = None
+            if not isinstance(rule_indx, int) or isinstance(rule_indx, bool) or not 0 <= rule_indx < len(self.rules):
+                return self._score(False, None, 0, f"Reaction {node.name} does not match any rule.")
+            if node.perform_rule_indx is None or node.source is None or node.target is None:
+                source_ids, target_ids = self._rule_ids[rule_indx][:2]
+            else:
+                # explicit materials win over the rule, as in commit; unknown names stay as strings
+                source_ids = tuple(self.material_ids.get(m, m) for m in node.source)
+                target_ids = tuple(self.material_ids.get(m, m) for m in node.target)
+            rule = self.rules[rule_indx]
+            compiled.append((source_ids, target_ids, rule.get("time", 0), rule.get("cost", 0)))
+
+        order = self._dependency_order(nodes)
+        if order is None:
+            return self._score(False, None, 0, "Plan has a dependency cycle or an unknown dependency.")
+
+        # earliest times as commit would track them, starting from the initial sources at time 0
+        earliest = dict.fromkeys(self._initial_ids, 0)
+        total_cost = 0
+        for i in order:
+            source_ids, target_ids, rule_time, rule_cost = compiled[i]
+            current_time = 0
+            for source_id in source_ids:
+                if source_id not in earliest:
+                    material = source_id if isinstance(source_id, str) else self.materials[source_id]
+                    return self._score(False, None, total_cost, f"Running {nodes[i].name}: Source material {material} is not available.")
+                current_time = max(current_time, earliest[source_id])
+            current_time += rule_time
+            for target_id in target_ids:
+                earliest[target_id] = min(earliest.get(target_id, current_time), current_time)
+            total_cost += rule_cost
+
+        target_id = self.material_ids.get(self.target)
+        if target_id not in earliest:
+            return self._score(False, None, total_cost, f"Target {self.target} is never produced.")
+        return self._score(True, earliest[target_id], total_cost)
+
+    @staticmethod
+    def _dependency_order(nodes: List[SubTTNode]) -> List[int] | None:
+        """Kahn's order over subtask positions, ties broken by plan order; None on cycles."""
+        positions = {}
+        for i, node in enumerate(nodes):
+            positions.setdefault(node.name, []).append(i)
+        # a dependency on a repeated name waits for every subtask with that name; unknown names never resolve
+        in_degree = [sum(len(positions.get(dependency, ())) or 1 for dependency in node.dependencies) for node in nodes]
+        successors = [[] for _ in nodes]
+        for i, node in enumerate(nodes):
+            for dependency in node.dependencies:
+                for j in positions.get(dependency, []):
+                    successors[j].append(i)
+        ready = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+        while ready:
+            i = ready.popleft()
+            order.append(i)
+            for j in successors[i]:
+                in_degree[j] -= 1
+                if in_degree[j] == 0:
+                    ready.append(j)
+        return order if len(order) == len(nodes) else None
+
     def get_available_materials(self) -> Set[str]:
-        return self.available_materials.copy()
+        return self.available_materials
 
     def get_final_result(self) -> int:
-        return self.material_earliest_time.get(self.target, None), self.total_cost
+        target_id = self.material_ids.get(self.target)
+        if target_id is None or not self._available >> target_id & 1:
+            return None, self.total_cost
+        return self._earliest[target_id], self.total_cost
+
+class TTEnvFactory:
+    """Parse and index each question's rules once, then hand out fresh envs.
+
+    Parsed templates are cached by question id when one is given, otherwise
+    by a hash of the config, and the least recently used ones are dropped
+    beyond ``max_size``. ``create`` returns a fork, so attempts never share
+    mutable state.
+    """
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._templates: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(config: dict | str | None, question_id=None) -> tuple:
+        if question_id is not None:
+            return ("id", question_id)
+        if not isinstance(config, str):
+            # keep list order: the first matching rule wins
+            config = json.dumps(config, sort_keys=True, ensure_ascii=False)
+        return ("sha256", hashlib.sha256(config.encode("utf-8")).hexdigest())
+
+    def create(self, config: dict | str | None, question_id=None, journal_size: int = 10000) -> TTEnv:
+        key = self.key(config, question_id)
+        template = self._templates.get(key)
+        if template is None:
+            self.misses += 1
+            template = self._templates[key] = TTEnv(config)
+            if len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        else:
+            self.hits += 1
+            self._templates.move_to_end(key)
+        return template.fork(journal_size)
 
 if __name__ == "__main__":
     config_json = '''
@@ -25,12 +25,15 @@ class SimpleSimRunner(Runner):
         return subtask.name
     
 class TTRunner(Runner):
-    def __init__(self, model, executor):
+    def __init__(self, model, executor, time_scale: float = 0):
         super().__init__(model, executor)
         self._name = 'TTRunner'
+        # seconds of wall-clock sleep per unit of rule time; 0 disables sleeping
+        self.time_scale = time_scale
     
     def run(self, subtask: SubTTNode) -> str:
-        # time.sleep(subtask.time)
+        if self.time_scale > 0:
+            time.sleep(subtask.time * self.time_scale)
         return subtask.name
     
 if __name__ == "__main__":
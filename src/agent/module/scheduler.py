@@ -1,83 +1,655 @@
 import multiprocessing
+import multiprocessing.connection
+import heapq, os, pickle
+import threading
 import time, copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from src.agent.module.subtask import SubTaskNode
 from src.utils.logger_config import logger, COLOR_CODES, RESET
 
-def execute_task(runner, task, queue):
+def _timed_run(runner, task):
+    """Run a subtask and return its result with a ``(start, finish, pid, tid)`` wall-clock span."""
+    start = time.time()
     result = runner.run(task)
-    if hasattr(task, 'question'):
-        queue.put((task.question, result))
+    return result, (start, time.time(), os.getpid(), threading.get_ident())
+
+def _beat(heartbeat, interval):
+    while True:
+        heartbeat.value = time.time()
+        time.sleep(interval)
+
+def execute_task(runner, task, conn, heartbeat=None, heartbeat_interval=1.0):
+    """Process entry point: sends ``(label, result, span)`` or an ``Exception`` back on ``conn``."""
+    if heartbeat is not None:
+        threading.Thread(target=_beat, args=(heartbeat, heartbeat_interval), daemon=True).start()
+    try:
+        result, span = _timed_run(runner, task)
+    except Exception as e:
+        conn.send(RuntimeError(f"{type(e).__name__}: {e}"))
     else:
-        queue.put((task.name, result))
+        if hasattr(task, 'question'):
+            conn.send((task.question, result, span))
+        else:
+            conn.send((task.name, result, span))
+    conn.close()
+
+_worker_runner = None
+
+def _init_worker(runner, pids=None):
+    global _worker_runner
+    _worker_runner = runner
+    if pids is not None:
+        pids.put(os.getpid())
+
+def _worker_pid(_):
+    return os.getpid()
+
+def _pool_execute(task):
+    result, span = _timed_run(_worker_runner, task)
+    return task.name, result, span
     
 class scheduler:
-    def __init__(self, runner, env):
+    def __init__(self, runner, env, max_workers: int | None = None, tracer=None,
+                 task_timeout: float | None = None, heartbeat_timeout: float | None = None,
+                 max_task_retries: int = 0, retry_backoff: float = 1.0):
         self.name = 'scheduler'
         self.runner = runner
         self.env = env
+        # at most this many subtasks run at once; None means unbounded
+        self.max_workers = max_workers
+        # optional src.utils.tracing.ChromeTracer
+        self.tracer = tracer
+        # seconds a subtask attempt may run / stay silent before it is killed (process backend)
+        self.task_timeout = task_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        # a failed subtask is re-run alone, after retry_backoff * 2 ** (attempt - 1) seconds
+        self.max_task_retries = max_task_retries
+        self.retry_backoff = retry_backoff
     
     def run(self, task: list) -> str:
         raise NotImplementedError
+
+    def _prepare(self, tasks: list[SubTaskNode]):
+        """Index the plan once: successor lists and in-degrees keyed by task name.
+
+        The planner's nodes are left untouched; ``task.dependencies`` is only read.
+        """
+        self.tasks = {task.name: task for task in tasks}
+        self.dependency_count = {task.name: len(task.dependencies) for task in tasks}
+        self.successors = {task.name: [] for task in tasks}
+        for task in tasks:
+            for dependency in task.dependencies:
+                if dependency in self.successors:
+                    self.successors[dependency].append(task.name)
+        self.rank = self._upward_rank(tasks)
+        self.final_result = None
+        self.running = 0
+        self.timeline = []
+        self.wall_span = None
+        self.virtual_start = {}
+        self.virtual_finish = {}
+        self._ready = []
+        self._sequence = 0
+        self._worker_free = [0] * self.max_workers if self.max_workers else None
+        self.plan_id = self.tracer.begin_plan() if self.tracer else None
+        self.attempts = {}
+        self._retries = []
+        self._push_ready(task for task in tasks if self.dependency_count[task.name] == 0)
+
+    def _upward_rank(self, tasks: list[SubTaskNode]) -> dict[str, float]:
+        """HEFT upward rank: a task's own time plus the longest chain of successors after it."""
+        remaining = {task.name: len(self.successors[task.name]) for task in tasks}
+        order = [task.name for task in tasks if remaining[task.name] == 0]
+        rank = {}
+        for task_name in order:
+            task = self.tasks[task_name]
+            rank[task_name] = getattr(task, 'time', 0) + max(
+                (rank[successor] for successor in self.successors[task_name]), default=0
+            )
+            for dependency in task.dependencies:
+                if dependency in remaining:
+                    remaining[dependency] -= 1
+                    if remaining[dependency] == 0:
+                        order.append(dependency)
+        for task in tasks:
+            rank.setdefault(task.name, getattr(task, 'time', 0))
+        return rank
+
+    def _push_ready(self, tasks):
+        for task in tasks:
+            heapq.heappush(self._ready, (-self.rank[task.name], self._sequence, task.name))
+            self._sequence += 1
+
+    def _dispatch(self) -> list[SubTaskNode]:
+        """Pop ready subtasks by rank while workers are free and place them on the virtual clock."""
+        dispatched = []
+        while self._ready and (self.max_workers is None or self.running < self.max_workers):
+            _, _, task_name = heapq.heappop(self._ready)
+            task = self.tasks[task_name]
+            start = max(
+                (self.virtual_finish[dependency] for dependency in task.dependencies if dependency in self.virtual_finish),
+                default=0,
+            )
+            if self._worker_free is not None:
+                start = max(start, heapq.heappop(self._worker_free))
+            finish = start + getattr(task, 'time', 0)
+            if self._worker_free is not None:
+                heapq.heappush(self._worker_free, finish)
+            self.virtual_start[task_name] = start
+            self.virtual_finish[task_name] = finish
+            self.timeline.append({"name": task_name, "start": start, "finish": finish})
+            self.running += 1
+            dispatched.append(task)
+            if self.tracer:
+                self.tracer.instant(task_name, "dispatch", {"plan": self.plan_id, "virtual_start": start, "virtual_finish": finish})
+        return dispatched
+
+    def _on_failure(self, task_name: str, error) -> float:
+        """Record a failed attempt and return the backoff before retrying it.
+
+        Committed env state is kept; only this subtask runs again. Raises
+        once the subtask has used up ``max_task_retries``.
+        """
+        attempts = self.attempts[task_name] = self.attempts.get(task_name, 0) + 1
+        if attempts > self.max_task_retries:
+            raise RuntimeError(f"Task {task_name} failed after {attempts} attempt(s): {error}")
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        logger.warning(f"Task {COLOR_CODES['YELLOW']}{task_name}{RESET} failed ({error}), retrying in {delay:.1f}s")
+        if self.tracer:
+            self.tracer.instant(task_name, "retry", {"plan": self.plan_id, "attempt": attempts, "error": str(error)})
+        return delay
+
+    def _schedule_retry(self, task_name: str, error):
+        heapq.heappush(self._retries, (time.time() + self._on_failure(task_name, error), task_name))
+
+    def _due_retries(self) -> list[SubTaskNode]:
+        now = time.time()
+        due = []
+        while self._retries and self._retries[0][0] <= now:
+            _, task_name = heapq.heappop(self._retries)
+            due.append(self.tasks[task_name])
+        return due
+
+    def _wait_timeout(self, deadline: float | None = None) -> float | None:
+        """Seconds until the next retry or ``deadline``, whichever is sooner; None if neither."""
+        wakeups = [t for t in (deadline, self._retries[0][0] if self._retries else None) if t is not None]
+        return max(min(wakeups) - time.time(), 0) if wakeups else None
+
+    def _complete(self, task_name: str, result, span: tuple | None = None):
+        """Commit a finished task and queue the dependents it released.
+
+        ``span`` is the ``(start, finish, pid, tid)`` wall-clock interval the
+        runner took, when the backend measured it.
+        """
+        task = self.tasks.pop(task_name)
+        self.running -= 1
+        label = task.question if hasattr(task, 'question') else task_name
+        logger.info(f"Task {COLOR_CODES['GREEN']}{label}{RESET} completed with result: {COLOR_CODES['GREEN']}{result}{RESET}")
+        if hasattr(self.env, 'commit'):
+            result = self.env.commit(task)
+        task.answer = result
+        self.final_result = result
+        if span is not None:
+            start, finish = span[:2]
+            self.wall_span = (min(start, self.wall_span[0]), max(finish, self.wall_span[1])) if self.wall_span else (start, finish)
+        if self.tracer:
+            if span is not None:
+                self.tracer.span(task_name, "run", *span, {"plan": self.plan_id})
+            start, finish = self.virtual_start[task_name], self.virtual_finish[task_name]
+            self.tracer.virtual_span(task_name, self.plan_id, start, finish)
+            self.tracer.instant(task_name, "commit", {"plan": self.plan_id, "virtual_finish": finish, "result": str(result)})
+
+        released = []
+        for dependent_task_name in self.successors[task_name]:
+            dependent_task = self.tasks[dependent_task_name]
+            if hasattr(self.env, 'update'):
+                self.env.update(dependent_task, task)
+            self.dependency_count[dependent_task_name] -= 1
+            if self.dependency_count[dependent_task_name] == 0:
+                released.append(dependent_task)
+        self._push_ready(released)
+
+    def _final_result(self):
+        if hasattr(self.env, 'get_final_result'):
+            return self.env.get_final_result()
+        return self.final_result
+
+    @property
+    def makespan(self):
+        return max((entry["finish"] for entry in self.timeline), default=0)
+
+    @property
+    def peak_parallelism(self) -> int:
+        events = []
+        for entry in self.timeline:
+            if entry["finish"] > entry["start"]:
+                events.append((entry["start"], 1))
+                events.append((entry["finish"], -1))
+        peak = running = 0
+        for _, delta in sorted(events):
+            running += delta
+            peak = max(peak, running)
+        return peak
+
+    def report(self) -> dict:
+        """Virtual-clock schedule of the last run, next to the env's unconstrained makespan.
+
+        ``makespan``, ``unconstrained_makespan`` and the timeline are in rule
+        time units, so they compare with each other. ``wall_clock_seconds``
+        is the real time from the first subtask start to the last finish the
+        backend measured, or None when nothing ran (``SimulatedScheduler``);
+        it does not compare with the other values.
+        """
+        unconstrained = None
+        if hasattr(self.env, 'get_final_result'):
+            unconstrained = self.env.get_final_result()[0]
+        return {
+            "max_workers": self.max_workers,
+            "units": "rule time",
+            "makespan": self.makespan,
+            "unconstrained_makespan": unconstrained,
+            "wall_clock_seconds": self.wall_span[1] - self.wall_span[0] if self.wall_span else None,
+            "peak_parallelism": self.peak_parallelism,
+            "timeline": self.timeline,
+        }
     
 class ParallelScheduler(scheduler):
-    def __init__(self, runner, env):
-        super().__init__(runner, env)
+    """One process per subtask attempt, released in completion order.
+
+    With ``task_timeout`` an attempt running longer is terminated; with
+    ``heartbeat_timeout`` so is one whose process stops beating. Beats come
+    from a daemon thread and are timed from the first one, so they only
+    catch a process frozen as a whole, not a runner stuck in its own code
+    or a slow start-up; ``task_timeout`` covers those. Either way,
+    and when the runner raises or the process dies, only that subtask is
+    retried (see ``scheduler._on_failure``).
+    """
+    def __init__(self, runner, env, **kwargs):
+        super().__init__(runner, env, **kwargs)
         self.name = 'ParallelScheduler'
         
     def copy_runner(self):
         return copy.deepcopy(self.runner)
     
+    def _start(self, task: SubTaskNode, connections: dict):
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        heartbeat = None
+        args = (self.copy_runner(), task, writer)
+        if self.heartbeat_timeout:
+            # 0 until the child's first beat: interpreter start-up does not count against the timeout
+            heartbeat = multiprocessing.Value('d', 0.0)
+            args += (heartbeat, self.heartbeat_timeout / 3)
+        process = multiprocessing.Process(target=execute_task, args=args)
+        process.start()
+        writer.close()
+        deadline = time.time() + self.task_timeout if self.task_timeout else None
+        connections[reader] = (process, task.name, deadline, heartbeat)
+
+    def _check_liveness(self, connections: dict):
+        now = time.time()
+        for reader, (process, task_name, deadline, heartbeat) in list(connections.items()):
+            if deadline is not None and now > deadline:
+                error = f"timed out after {self.task_timeout}s"
+            elif heartbeat is not None and heartbeat.value and now - heartbeat.value > self.heartbeat_timeout:
+                error = f"no heartbeat for {self.heartbeat_timeout}s"
+            else:
+                continue
+            del connections[reader]
+            process.kill()
+            process.join()
+            reader.close()
+            self._schedule_retry(task_name, error)
+
+    def _next_wakeup(self, connections: dict) -> float | None:
+        deadlines = [deadline for _, _, deadline, _ in connections.values() if deadline is not None]
+        if self.heartbeat_timeout and connections:
+            deadlines.append(time.time() + self.heartbeat_timeout / 3)
+        return self._wait_timeout(min(deadlines) if deadlines else None)
+
     def run(self, tasks: list[SubTaskNode]) -> str:
-        self.tasks = {task.name: task for task in tasks}
-        self.dependency_count = {task.name: len(task.dependencies) for task in tasks}
-        self.task_completed = {task.name: multiprocessing.Value('b', False) for task in tasks}
+        self._prepare(tasks)
+
+        connections = {}
+        try:
+            for task in self._dispatch():
+                self._start(task, connections)
+
+            while connections or self._retries:
+                for reader in multiprocessing.connection.wait(list(connections), timeout=self._next_wakeup(connections)):
+                    process, task_name, _, _ = connections.pop(reader)
+                    try:
+                        message = reader.recv()
+                    except EOFError:
+                        process.join()
+                        message = RuntimeError(f"exited with code {process.exitcode} before returning a result")
+                    finally:
+                        reader.close()
+                    process.join()
+
+                    if isinstance(message, Exception):
+                        self._schedule_retry(task_name, message)
+                        continue
+                    completed_task, result, span = message
+                    self._complete(task_name, result, span)
+                    for task in self._dispatch():
+                        self._start(task, connections)
 
-        queue = multiprocessing.Queue()
-        final_result = None
+                self._check_liveness(connections)
+                for task in self._due_retries():
+                    self._start(task, connections)
+        finally:
+            # a plan that fails (retries used up, a commit error) must not leave its other subtasks running
+            for reader, (process, _, _, _) in connections.items():
+                process.kill()
+                process.join()
+                reader.close()
 
-        while self.tasks:
-            executable_tasks = [task for task in self.tasks.values() if self.dependency_count[task.name] == 0]
-            if not executable_tasks:
+        return self._final_result()
+
+class InlineScheduler(scheduler):
+    """Run subtasks in the calling process, one after another.
+
+    Intended for runners whose ``run`` is a pure function (e.g. ``TTRunner``):
+    the ``(time, cost)`` result is the same as with ``ParallelScheduler``,
+    without spawning an interpreter per subtask.
+    """
+    def __init__(self, runner, env, **kwargs):
+        super().__init__(runner, env, **kwargs)
+        self.name = 'InlineScheduler'
+
+    def run(self, tasks: list[SubTaskNode]) -> str:
+        self._prepare(tasks)
+        ready = deque(self._dispatch())
+        while ready:
+            task = ready.popleft()
+            try:
+                result, span = _timed_run(self.runner, task)
+            except Exception as e:
+                time.sleep(self._on_failure(task.name, e))
+                ready.appendleft(task)
+                continue
+            self._complete(task.name, result, span)
+            ready.extend(self._dispatch())
+        return self._final_result()
+
+class ThreadScheduler(scheduler):
+    """Run ready subtasks on a thread pool; commits stay on the calling thread."""
+    def __init__(self, runner, env, **kwargs):
+        super().__init__(runner, env, **kwargs)
+        self.name = 'ThreadScheduler'
+
+    def run(self, tasks: list[SubTaskNode]) -> str:
+        self._prepare(tasks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(_timed_run, self.runner, task): task.name for task in self._dispatch()}
+            while futures or self._retries:
+                done, _ = wait(futures, timeout=self._wait_timeout(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_name = futures.pop(future)
+                    try:
+                        result, span = future.result()
+                    except Exception as e:
+                        self._schedule_retry(task_name, e)
+                        continue
+                    self._complete(task_name, result, span)
+                for task in self._due_retries() + self._dispatch():
+                    futures[executor.submit(_timed_run, self.runner, task)] = task.name
+        return self._final_result()
+
+class WorkerPool:
+    """Long-lived process pool whose workers each hold one copy of the runner.
+
+    Created once per run and shared by every ``PooledScheduler``: the runner
+    is pickled once per worker at start-up, and each dispatch only ships the
+    subtask itself.
+    """
+    def __init__(self, runner, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.runner_bytes = len(pickle.dumps(runner))
+        context = multiprocessing.get_context()
+        # what one-process-per-subtask pays each time: start an interpreter holding the runner and let it exit
+        start = time.perf_counter()
+        process = context.Process(target=_init_worker, args=(runner,))
+        process.start()
+        process.join()
+        self.spawn_seconds = time.perf_counter() - start
+        # every worker reports its pid from the initializer, including ones the executor starts later
+        self._pid_queue = context.SimpleQueue()
+        self._pids = set()
+        start = time.perf_counter()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(runner, self._pid_queue),
+        )
+        self._pids.update(self.executor.map(_worker_pid, range(self.max_workers)))
+        self.startup_seconds = time.perf_counter() - start
+        self.workers = max(len(self.worker_pids), 1)
+        self.tasks_dispatched = 0
+
+    def submit(self, task):
+        self.tasks_dispatched += 1
+        return self.executor.submit(_pool_execute, task)
+
+    @property
+    def worker_pids(self) -> set[int]:
+        while not self._pid_queue.empty():
+            self._pids.add(self._pid_queue.get())
+        return set(self._pids)
+
+    def owns(self, process) -> bool:
+        return process.pid in self.worker_pids
+
+    def report(self) -> dict:
+        """Spawn and runner-pickling overhead avoided versus one process per subtask.
+
+        ``spawn_seconds`` is one timed start-to-exit of a single process
+        holding the runner; ``startup_seconds`` is the whole pool starting
+        its workers concurrently, which is cheaper than that many spawns.
+        """
+        spawns_saved = max(self.tasks_dispatched - self.workers, 0)
+        return {
+            "workers": self.workers,
+            "tasks_dispatched": self.tasks_dispatched,
+            "spawns_saved": spawns_saved,
+            "spawn_seconds": self.spawn_seconds,
+            "startup_seconds": self.startup_seconds,
+            "estimated_spawn_seconds_saved": spawns_saved * self.spawn_seconds,
+            "runner_bytes": self.runner_bytes,
+            "runner_pickle_bytes_saved": spawns_saved * self.runner_bytes,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+class PooledScheduler(scheduler):
+    """Dispatch ready subtasks to a shared ``WorkerPool`` in completion order."""
+    def __init__(self, runner, env, pool: WorkerPool = None, **kwargs):
+        super().__init__(runner, env, **kwargs)
+        self.name = 'PooledScheduler'
+        self.pool = pool
+
+    def run(self, tasks: list[SubTaskNode]) -> str:
+        if self.pool is None:
+            raise ValueError("PooledScheduler requires a WorkerPool")
+        self._prepare(tasks)
+        futures = {self.pool.submit(task): task.name for task in self._dispatch()}
+        while futures or self._retries:
+            done, _ = wait(futures, timeout=self._wait_timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                task_name = futures.pop(future)
+                try:
+                    _, result, span = future.result()
+                except Exception as e:
+                    self._schedule_retry(task_name, e)
+                    continue
+                self._complete(task_name, result, span)
+            for task in self._due_retries() + self._dispatch():
+                futures[self.pool.submit(task)] = task.name
+        return self._final_result()
+
+class SimulatedScheduler(scheduler):
+    """Discrete-event simulation of a plan on a virtual clock.
+
+    Each subtask occupies the interval ``[start, start + task.time)``, where
+    ``start`` is the virtual time its last dependency finished (or, with
+    ``max_workers``, the first time a worker is free). Nothing is slept or
+    spawned: the runner is not invoked and subtasks are committed to the env
+    in virtual finish order. When every subtask depends exactly on the
+    producers of its sources and workers are unbounded, ``makespan`` equals
+    the env's earliest time for the target.
+    """
+    def __init__(self, runner, env, **kwargs):
+        super().__init__(runner, env, **kwargs)
+        self.name = 'SimulatedScheduler'
+
+    def run(self, tasks: list[SubTaskNode]) -> str:
+        self._prepare(tasks)
+        events = []
+        for task in self._dispatch():
+            heapq.heappush(events, (self.virtual_finish[task.name], self._sequence, task.name))
+            self._sequence += 1
+
+        while events:
+            _, _, task_name = heapq.heappop(events)
+            self._complete(task_name, task_name)
+            for task in self._dispatch():
+                heapq.heappush(events, (self.virtual_finish[task.name], self._sequence, task.name))
+                self._sequence += 1
+
+        return self._final_result()
+
+class BatchScheduler:
+    """Schedule the plans of many questions at once on one shared executor.
+
+    Every plan keeps its own ``scheduler`` state and env, so commits of one
+    question never touch another's. Subtasks from all plans share the
+    executor: the ``WorkerPool`` when one is given, otherwise a thread pool
+    of ``max_workers`` threads kept for the lifetime of this object.
+    ``scheduler_kwargs`` configure each plan's scheduler (its own
+    ``max_workers`` limit, ``max_task_retries`` and ``retry_backoff``);
+    timeouts and heartbeats need a process per attempt and are rejected.
+    """
+    def __init__(self, runner, pool: WorkerPool = None, max_workers: int | None = None, tracer=None,
+                 scheduler_kwargs: dict | None = None):
+        self.name = 'BatchScheduler'
+        self.runner = runner
+        self.pool = pool
+        self.tracer = tracer
+        self.scheduler_kwargs = dict(scheduler_kwargs or {})
+        unsupported = [key for key in ("task_timeout", "heartbeat_timeout") if self.scheduler_kwargs.get(key)]
+        if unsupported:
+            raise ValueError(f"BatchScheduler cannot kill shared workers, so {', '.join(unsupported)} is not supported")
+        self.executor = None if pool is not None else ThreadPoolExecutor(max_workers=max_workers)
+
+    def _submit(self, task):
+        if self.pool is not None:
+            return self.pool.submit(task)
+        return self.executor.submit(_timed_run, self.runner, task)
+
+    def _collect(self, future):
+        if self.pool is not None:
+            _, result, span = future.result()
+        else:
+            result, span = future.result()
+        return result, span
+
+    def run(self, jobs: list[tuple[list[SubTaskNode], object]], labels: list | None = None) -> list:
+        """Run ``(tasks, env)`` jobs together.
+
+        Returns one entry per job, in order: the env's final result, or the
+        exception that stopped that job. A failing job does not affect the others.
+        ``labels`` (e.g. question ids) name each plan's row in the trace and
+        tag every event recorded while handling that plan.
+        """
+        plans = [scheduler(self.runner, env, tracer=self.tracer, **self.scheduler_kwargs) for _, env in jobs]
+        results = [None] * len(jobs)
+        futures = {}
+        outstanding = [0] * len(jobs)
+        previous_label = self.tracer.context.get("question") if self.tracer else None
+
+        def label(index):
+            if self.tracer and labels is not None:
+                self.tracer.context["question"] = labels[index]
+
+        def submit(index, tasks):
+            for task in tasks:
+                futures[self._submit(task)] = (index, task.name)
+                outstanding[index] += 1
+
+        def finish(index):
+            if outstanding[index] == 0 and not plans[index]._retries and results[index] is None:
+                results[index] = plans[index]._final_result()
+
+        for index, (tasks, _) in enumerate(jobs):
+            label(index)
+            try:
+                plans[index]._prepare(tasks)
+                submit(index, plans[index]._dispatch())
+            except Exception as e:
+                results[index] = e
+            finish(index)
+
+        while True:
+            retrying = [index for index, plan in enumerate(plans) if plan._retries and results[index] is None]
+            if not futures and not retrying:
                 break
+            timeout = min((plans[index]._wait_timeout() for index in retrying), default=None)
+            if futures:
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout)
+                done = ()
+            for future in done:
+                index, task_name = futures.pop(future)
+                outstanding[index] -= 1
+                if isinstance(results[index], Exception):
+                    continue
+                label(index)
+                try:
+                    try:
+                        result, span = self._collect(future)
+                    except Exception as e:
+                        # raises once the subtask has used up its retries
+                        plans[index]._schedule_retry(task_name, e)
+                    else:
+                        plans[index]._complete(task_name, result, span)
+                        submit(index, plans[index]._dispatch())
+                except Exception as e:
+                    results[index] = e
+                    continue
+                finish(index)
+            for index in retrying:
+                if results[index] is None:
+                    label(index)
+                    submit(index, plans[index]._due_retries())
+        if self.tracer and labels is not None:
+            if previous_label is None:
+                self.tracer.context.pop("question", None)
+            else:
+                self.tracer.context["question"] = previous_label
+        self.plans = plans
+        return results
 
-            processes = {}
-            for task in executable_tasks:
-                new_runner = self.copy_runner()
-                process = multiprocessing.Process(target=execute_task, args=(new_runner, task, queue))
-                process.start()
-                processes[process] = task.name
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
 
-            while processes:
-                for process in list(processes):
-                    process.join()
-                    task_name = processes.pop(process)
-                    
-                    completed_task, result = queue.get()
-                    logger.info(f"Task {COLOR_CODES['GREEN']}{completed_task}{RESET} completed with result: {COLOR_CODES['GREEN']}{result}{RESET}")
-                    if hasattr(self.env, 'commit'):
-                        result = self.env.commit(self.tasks[task_name])
-                    self.tasks[task_name].answer = result
-                    final_result = result
-                    
-                    with self.task_completed[task_name].get_lock():
-                        self.task_completed[task_name].value = True
-                    
-                    for dependent_task_name, task in self.tasks.items():
-                        if task_name in task.dependencies:
-                            task.dependencies.remove(task_name)
-                            if hasattr(self.env, 'update'):
-                                self.env.update(task, self.tasks[task_name])
-                            self.dependency_count[dependent_task_name] -= 1
-                            if self.dependency_count[dependent_task_name] == 0:
-                                new_runner = self.copy_runner()
-                                new_process = multiprocessing.Process(target=execute_task, args=(new_runner, task, queue))
-                                new_process.start()
-                                processes[new_process] = dependent_task_name
-                    del self.tasks[task_name]
+SCHEDULERS = {
+    'parallel': ParallelScheduler,
+    'process': ParallelScheduler,
+    'inline': InlineScheduler,
+    'threads': ThreadScheduler,
+    'pool': PooledScheduler,
+    'sim': SimulatedScheduler,
+}
 
-        if hasattr(self.env, 'get_final_result'):
-            return self.env.get_final_result()
-        return final_result
+def get_scheduler(name: str, runner, env, **kwargs) -> scheduler:
+    if name not in SCHEDULERS:
+        raise ValueError(f"Unsupported scheduler: {name}. Choose from: {', '.join(SCHEDULERS)}")
+    return SCHEDULERS[name](runner, env, **kwargs)
 
 if __name__ == "__main__":
     logger.info("Running scheduler")
@@ -131,7 +131,8 @@ def _has_cycle(plan: list[dict[str, Any]]) -> bool:
     adjacency: dict[str, list[str]] = {task["name"]: [] for task in plan}
 
     for task in plan:
-        for dep in task["dependencies"]:
+        # the worker also waits for inputs_from producers, so they are edges too
+        for dep in _dedupe_keep_order(task["dependencies"] + task["inputs_from"]):
             if dep in adjacency:
                 adjacency[dep].append(task["name"])
                 in_degree[task["name"]] += 1
@@ -1,45 +1,88 @@
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any
+import os
 import re
+import threading
+import time
 
 from src.agent.module.tooling.runtime import ToolRuntime, ToolRuntimeError
 from src.agent.module.tooling.registry import ToolRegistry
 
 
 class ToolAwareWorker:
-    """Execute tool-aware handoff tasks with dependency control."""
+    """Execute tool-aware handoff tasks with dependency control.
 
-    def __init__(self, registry: ToolRegistry, runtime: ToolRuntime):
+    Ready tasks run concurrently on up to ``max_concurrency`` threads; a task
+    is submitted as soon as all of its dependencies and ``inputs_from``
+    producers have finished.
+    """
+
+    def __init__(self, registry: ToolRegistry, runtime: ToolRuntime, tracer=None, max_concurrency: int = 4):
         self.registry = registry
         self.runtime = runtime
+        # optional src.utils.tracing.ChromeTracer
+        self.tracer = tracer
+        self.max_concurrency = max_concurrency
 
     def execute_handoff(self, handoff: list[dict[str, Any]]) -> dict[str, Any]:
         pending = {task["task_name"]: dict(task) for task in handoff}
         outputs: dict[str, Any] = {}
         traces: list[dict[str, Any]] = []
+        started: dict[str, float] = {}
+        running: dict[Future, dict[str, Any]] = {}
+        # inputs_from need not be listed in dependencies, but the context is built at submit time
+        waits_for = {
+            name: set(task.get("dependencies", [])) | {dep for dep in task.get("inputs_from", []) if dep in pending}
+            for name, task in pending.items()
+        }
 
-        while pending:
-            ready = [
-                name
-                for name, task in pending.items()
-                if all(dep in outputs for dep in task.get("dependencies", []))
-            ]
-            if not ready:
-                raise ToolRuntimeError("cannot execute handoff: unresolved dependencies or dependency cycle")
-
-            for task_name in ready:
-                task = pending.pop(task_name)
-                context = {dep: outputs[dep] for dep in task.get("inputs_from", []) if dep in outputs}
-                task_result = self._run_task(task, context)
-                outputs[task_name] = task_result
-                traces.append(
-                    {
-                        "task_name": task_name,
-                        "tool": task_result.get("tool"),
-                        "status": "ok",
-                    }
-                )
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while pending or running:
+                ready = [
+                    name
+                    for name, task in pending.items()
+                    if all(dep in outputs for dep in waits_for[name])
+                ]
+                for task_name in ready:
+                    task = pending.pop(task_name)
+                    context = {dep: outputs[dep] for dep in task.get("inputs_from", []) if dep in outputs}
+                    if self.tracer:
+                        self.tracer.instant(task_name, "dispatch")
+                    running[executor.submit(self._timed_run_task, task, context, started)] = task
+
+                if not running:
+                    raise ToolRuntimeError("cannot execute handoff: unresolved dependencies or dependency cycle")
+
+                done, _ = wait(running, timeout=self._next_deadline(running, started), return_when=FIRST_COMPLETED)
+                if not done:
+                    self._raise_on_timeout(running, started)
+                    continue
+
+                for future in done:
+                    task = running.pop(future)
+                    task_name = task["task_name"]
+                    task_result, started_at, finished_at, thread_id = future.result()
+                    if self.tracer:
+                        self.tracer.span(
+                            task_name, "run", started_at, finished_at, os.getpid(), thread_id,
+                            {"tool": task_result.get("tool")},
+                        )
+                        self.tracer.instant(task_name, "commit")
+                    outputs[task_name] = task_result
+                    traces.append(
+                        {
+                            "task_name": task_name,
+                            "tool": task_result.get("tool"),
+                            "status": "ok",
+                            "started_at": started_at,
+                            "finished_at": finished_at,
+                        }
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
         return {
             "status": "success",
@@ -48,6 +91,38 @@ class ToolAwareWorker:
             "traces": traces,
         }
 
+    def _timed_run_task(
+        self, task: dict[str, Any], context: dict[str, Any], started: dict[str, float]
+    ) -> tuple[dict[str, Any], float, float, int]:
+        started_at = started[task["task_name"]] = time.time()
+        task_result = self._run_task(task, context)
+        return task_result, started_at, time.time(), threading.get_ident()
+
+    @staticmethod
+    def _task_deadline(task: dict[str, Any], started_at: float) -> float:
+        # every tool in the toolbox may use the full timeout_sec before the next one is tried
+        return started_at + int(task.get("timeout_sec", 30)) * max(len(task.get("toolbox", [])), 1)
+
+    def _next_deadline(self, running: dict[Future, dict[str, Any]], started: dict[str, float]) -> float | None:
+        deadlines = [
+            self._task_deadline(task, started[task["task_name"]])
+            for task in running.values()
+            if task["task_name"] in started
+        ]
+        if len(deadlines) < len(running):
+            # some tasks are still queued behind max_concurrency; re-check once they start
+            deadlines.append(time.time() + 1.0)
+        return max(min(deadlines) - time.time(), 0) if deadlines else None
+
+    def _raise_on_timeout(self, running: dict[Future, dict[str, Any]], started: dict[str, float]):
+        now = time.time()
+        for task in running.values():
+            task_name = task["task_name"]
+            if task_name in started and now >= self._task_deadline(task, started[task_name]):
+                raise ToolRuntimeError(
+                    f"task '{task_name}' timed out after {task.get('timeout_sec', 30)}s per tool"
+                )
+
     def _run_task(self, task: dict[str, Any], context: dict[str, Any]) -> dict[str, Any]:
         toolbox = task.get("toolbox", [])
         if not toolbox:
@@ -0,0 +1,39 @@
+import argparse
+import random
+import time
+from src.gen_data.batch_std import batch_min_time_cost
+from src.gen_data.gen_abs_task import generate_abstract_workflow
+from src.gen_data.std import min_time_cost_to_target
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare solving candidate graphs one by one and in NumPy batches.")
+    parser.add_argument("--graphs", type=int, default=1000)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--batch_size", type=int, nargs='+', default=[100, 1000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # the edge_config 3 random graphs of gen_abs_task
+    random.seed(args.seed)
+    n = args.nodes
+    graphs = [generate_abstract_workflow("random", n, random.randint(n, n * (n - 1) // 2)) for _ in range(args.graphs)]
+    print(f"{len(graphs)} graphs, {sum(len(graph['rules']) for graph in graphs)} rules")
+
+    start = time.perf_counter()
+    expected = [min_time_cost_to_target(graph) for graph in graphs]
+    sequential = time.perf_counter() - start
+    print(f"one by one: {sequential:.2f}s")
+
+    for batch_size in args.batch_size:
+        for plans in (False, True):
+            start = time.perf_counter()
+            result = []
+            for i in range(0, len(graphs), batch_size):
+                result.extend(batch_min_time_cost(graphs[i:i + batch_size], plans=plans))
+            elapsed = time.perf_counter() - start
+            assert result == [solution[:len(solution) if plans else 3] for solution in expected], "solvers disagree"
+            label = "with plans" if plans else "metrics only"
+            print(f"batch {batch_size:>5} {label}: {elapsed:.2f}s ({sequential / elapsed:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import random
+import time
+from src.gen_data.gen_abs_task import generate_dag, generate_graph
+
+def legacy_get_random_int(a, b):
+    numbers = list(range(a, b + 1))
+    weights = [x + 1 for x in numbers]
+    return random.choices(numbers, weights=weights, k=1)[0]
+
+def legacy_generate_tree(n):
+    parent = [None] * n
+    edges = []
+    max_depth = 3
+    depth = [None] * n
+    depth[0] = 0
+    for i in range(1, n):
+        max_parent_depth = min(depth[i - 1] + 1, max_depth)
+        valid_parents = [p for p in range(i) if depth[p] < max_parent_depth]
+        if valid_parents:
+            p = random.choice(valid_parents)
+            parent[i] = p
+            edges.append((i, p))
+            depth[i] = depth[p] + 1
+        else:
+            p = 0
+            parent[i] = p
+            edges.append((i, p))
+            depth[i] = 1
+    return edges, parent
+
+def legacy_add_ancestor_edges(edges, n, parent, num_ancestor_edges):
+    num = 0
+    while num < num_ancestor_edges:
+        u = legacy_get_random_int(1, n - 1)
+        p = parent[u]
+        count = 0
+        while p is not None:
+            count += 1
+            p = parent[p]
+        if count == 0:
+            continue
+        t = count - 1 - legacy_get_random_int(0, count - 1)
+        p = parent[u]
+        while t > 0:
+            p = parent[p]
+            t -= 1
+        if (u, p) not in edges:
+            edges.append((u, p))
+            num += 1
+    return edges
+
+def legacy_is_cross_nodes(edges, n, u, v, parent):
+    if u < v:
+        u, v = v, u
+    if (u, v) in edges:
+        return False
+    while u is not None and u != v:
+        u = parent[u]
+    return u is None
+
+def legacy_add_cross_edges(edges, n, parent, num_cross_edges):
+    for _ in range(num_cross_edges):
+        u = legacy_get_random_int(0, n - 1)
+        v = legacy_get_random_int(0, n - 1)
+        while not legacy_is_cross_nodes(edges, n, u, v, parent):
+            u = legacy_get_random_int(0, n - 1)
+            v = legacy_get_random_int(0, n - 1)
+        if u < v:
+            u, v = v, u
+        edges.append((u, v))
+    return edges
+
+def legacy_generate_graph(n, m):
+    edges, parent = legacy_generate_tree(n)
+    num_ancestor_edges = random.randint(0, (m - (n - 1)) // 2)
+    edges = legacy_add_ancestor_edges(edges, n, parent, num_ancestor_edges)
+    num_cross_edges = m - len(edges)
+    edges = legacy_add_cross_edges(edges, n, parent, num_cross_edges)
+    return [(n - e[0], n - e[1]) for e in edges]
+
+def legacy_generate_dag(n, m):
+    # the random graph type used cyaron, which is optional now
+    from cyaron import Graph
+    graph = Graph.DAG(n, m, repeated_edges=False)
+    return [(e.start, e.end) for e in graph.iterate_edges()]
+
+def measure(generator, seed, *args):
+    random.seed(seed)
+    start = time.perf_counter()
+    edges = generator(*args)
+    return time.perf_counter() - start, (edges, random.getstate())
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the previous and current tree and DAG generators.")
+    parser.add_argument("--nodes", type=int, nargs='+', default=[1000, 5000, 10000, 100000])
+    parser.add_argument("--legacy_limit", type=int, default=5000, help="Skip the previous generators above this many nodes.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for nodes in args.nodes:
+        for name, current, previous, edges in (
+            ("tree", generate_graph, legacy_generate_graph, nodes * 5 // 4),
+            ("random", generate_dag, legacy_generate_dag, nodes * 3),
+        ):
+            elapsed, result = measure(current, args.seed, nodes, edges)
+            line = f"{name:>6} {nodes:>7} nodes {edges:>7} edges: current {elapsed:.2f}s"
+            if nodes <= args.legacy_limit:
+                legacy_elapsed, expected = measure(previous, args.seed, nodes, edges)
+                assert result == expected, "generators disagree"
+                line += f", previous {legacy_elapsed:.2f}s ({legacy_elapsed / elapsed:.1f}x)"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import random
+import time
+from src.gen_data.gen_abs_task import generate_abstract_workflow
+from src.gen_data.incremental_std import IncrementalSolver
+from src.gen_data.std import min_time_cost_to_target
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare re-solving from scratch with incremental repair after single-rule edits.")
+    parser.add_argument("--nodes", type=int, nargs='+', default=[2000, 10000])
+    parser.add_argument("--edge_factor", type=int, default=10, help="Edges per node.")
+    parser.add_argument("--edits", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    for nodes in args.nodes:
+        graph = generate_abstract_workflow("random", nodes, nodes * args.edge_factor, group_size_range=(1, 3))
+        start = time.perf_counter()
+        solver = IncrementalSolver(graph)
+        setup = time.perf_counter() - start
+
+        full = incremental = 0.0
+        for _ in range(args.edits):
+            handle = random.randrange(len(graph["rules"]))
+            field = random.choice(["time", "cost"])
+            value = random.randint(1, 50) if field == "time" else random.randint(1, 5)
+            start = time.perf_counter()
+            solver.update_rule(handle, **{field: value})
+            result = solver.solve()
+            incremental += time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = min_time_cost_to_target(solver.task_info)
+            full += time.perf_counter() - start
+            assert result == expected, "solvers disagree"
+        print(
+            f"{nodes:>6} nodes {len(graph['rules']):>7} rules: setup {setup:.2f}s, "
+            f"per edit full {full / args.edits * 1000:.1f}ms, incremental {incremental / args.edits * 1000:.1f}ms "
+            f"({full / incremental:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import json
+import random
+import time
+from src.gen_data.gen_abs_task import generate_abstract_workflow
+from src.gen_data.std import pareto_frontier
+
+def load_questions(args):
+    if args.data_file:
+        with open(args.data_file) as f:
+            return [item["question"] for item in json.load(f)]
+    random.seed(args.seed)
+    n = args.nodes
+    return [
+        generate_abstract_workflow("random", n, random.randint(n, n * (n - 1) // 2))
+        for _ in range(args.count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Pareto frontier solver over a dataset file or generated edge_config 3 graphs.")
+    parser.add_argument("--data_file", type=str, default=None, help="A data/dev JSON file; graphs are generated when omitted.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--max_labels", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    questions = load_questions(args)
+    start = time.perf_counter()
+    results = [pareto_frontier(question, args.max_labels) for question in questions]
+    elapsed = time.perf_counter() - start
+    exact = sum(is_exact for _, is_exact in results)
+    points = sum(len(frontier) for frontier, _ in results)
+    print(f"{len(questions)} questions in {elapsed:.2f}s, {exact} exact, {points / len(questions):.2f} frontier points on average")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import math
+import random
+import time
+from src.gen_data.gen_abs_task import generate_abstract_workflow
+from src.gen_data.std import min_time_cost_to_target
+
+def legacy_topological_sort(rules: list) -> list:
+    graph = {}
+    in_degree = {}
+    for rule in rules:
+        for source in rule["source"]:
+            if source not in graph:
+                graph[source] = []
+                in_degree[source] = 0
+        for target in rule["target"]:
+            if target not in graph:
+                graph[target] = []
+                in_degree[target] = 0
+        for source in rule["source"]:
+            for target in rule["target"]:
+                graph[source].append(target)
+                in_degree[target] += 1
+    queue = [node for node in in_degree if in_degree[node] == 0]
+    result = []
+    exist_nodes = []
+    while queue:
+        node = queue.pop(0)
+        exist_nodes.append(node)
+        for target in graph[node]:
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                queue.append(target)
+                for rule in rules:
+                    if target in rule["target"]:
+                        if all(source in exist_nodes for source in rule["source"]):
+                            result.append(rule)
+    return result
+
+def legacy_convert_rules(rules: list) -> list:
+    converted_rules = []
+    for rule in rules:
+        converted_rule = {
+            "name": f"Subtask{len(converted_rules) + 1}",
+            "source": rule["source"],
+            "target": rule["target"],
+            "dependencies": []
+        }
+        converted_rules.append(converted_rule)
+    for rule in converted_rules:
+        for src in rule["source"]:
+            for dep_rule in converted_rules:
+                if src in dep_rule["target"]:
+                    rule["dependencies"].append(dep_rule["name"])
+    return converted_rules
+
+def legacy_min_time_cost_to_target(task_info: dict) -> int:
+    """The previous solver: rescans every rule per material and rebuilds rule lists per relaxation."""
+    rules = task_info["rules"]
+    initial_source = task_info["initial_source"]
+    target = task_info["target"]
+
+    time_map = {source: 0 for source in initial_source}
+    cost_map = {source: 0 for source in initial_source}
+    rules_map = {source: [] for source in initial_source}
+    path_count = {source: 1 for source in initial_source}
+    
+    second_rules_map = {source: [] for source in initial_source}
+    second_time_map = {source: 0 for source in initial_source}
+
+    def get_time(node):
+        return time_map.get(node, float('inf'))
+    def get_cost(node):
+        return cost_map.get(node, float('inf'))
+    def get_rules(node):
+        return rules_map.get(node, [])
+    def make_hashable(d):
+        if isinstance(d, dict):
+            return frozenset((k, make_hashable(v)) for k, v in d.items())
+        elif isinstance(d, list):
+            return tuple(make_hashable(i) for i in d)
+        return d
+
+    def get_new_rules(rule):
+        new_rules = []
+        for src in rule["source"]:
+            new_rules.extend(get_rules(src))
+        new_rules.append(rule)
+        unique_rules = []
+        seen = set()
+        for r in new_rules:
+            r_tuple = make_hashable(r)
+            if r_tuple not in seen:
+                seen.add(r_tuple)
+                unique_rules.append(r)
+        return unique_rules
+    
+    def get_second_new_rules(rule):
+        new_rules = []
+        for src in rule["source"]:
+            new_rules.extend(second_rules_map.get(src, []))
+        new_rules.append(rule)
+        unique_rules = []
+        seen = set()
+        for r in new_rules:
+            r_tuple = make_hashable(r)
+            if r_tuple not in seen:
+                seen.add(r_tuple)
+                unique_rules.append(r)
+        return unique_rules
+
+    sorted_rules = legacy_topological_sort(rules)
+    
+    for rule in sorted_rules:
+        if not all(source in time_map for source in rule["source"]):
+            raise ValueError("Invalid rule")
+        source_time = max(get_time(src) for src in rule["source"])
+        new_time = source_time + rule["time"]
+        new_rules = get_new_rules(rule)
+        new_cost = sum(rule["cost"] for rule in new_rules)
+        new_path_count = math.prod(path_count[src] for src in rule["source"])
+        for target_node in rule["target"]:
+            if new_time < get_time(target_node):
+                second_time_map[target_node] = get_time(target_node)
+                second_rules_map[target_node] = get_rules(target_node)
+
+                time_map[target_node] = new_time
+                rules_map[target_node] = new_rules
+                cost_map[target_node] = new_cost
+            elif new_time == get_time(target_node):
+                if new_cost < get_cost(target_node):
+                    second_time_map[target_node] = get_time(target_node)
+                    second_rules_map[target_node] = get_rules(target_node)
+
+                    cost_map[target_node] = new_cost
+                    rules_map[target_node] = new_rules
+                else:
+                    second_time_map[target_node] = new_time
+                    second_rules_map[target_node] = new_rules
+            else:
+                second_time_map[target_node] = new_time
+                second_rules_map[target_node] = new_rules
+
+
+            if target_node not in path_count:
+                path_count[target_node] = new_path_count
+            else:                
+                path_count[target_node] += new_path_count            
+    
+    converted_rules = legacy_convert_rules(get_rules(target))
+    second_best_converted_rules = legacy_convert_rules(second_rules_map.get(target, []))
+    return time_map.get(target, float('inf')), cost_map.get(target, float('inf')), path_count.get(target, 0), converted_rules, second_best_converted_rules, second_time_map[target]
+
+def measure(solver, graph):
+    start = time.perf_counter()
+    result = solver(graph)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the previous and current reference solvers on large random graphs.")
+    parser.add_argument("--nodes", type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument("--edge_factor", type=int, default=10, help="Edges per node.")
+    parser.add_argument("--legacy_limit", type=int, default=20000, help="Skip the previous solver above this many rules.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    for nodes in args.nodes:
+        graph = generate_abstract_workflow("random", nodes, nodes * args.edge_factor, group_size_range=(1, 3))
+        rule_count = len(graph["rules"])
+        current, result = measure(min_time_cost_to_target, graph)
+        line = f"{nodes:>6} nodes {rule_count:>7} rules: current {current:.2f}s"
+        if rule_count <= args.legacy_limit:
+            previous, expected = measure(legacy_min_time_cost_to_target, graph)
+            assert result == expected, "solvers disagree"
+            line += f", previous {previous:.2f}s ({previous / current:.1f}x)"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.subtask import SubTTNode
+from src.gen_data.gen_abs_task import generate_abstract_workflow
+
+class LinearScanEnv(TTEnv):
+    """The previous lookup: scan every rule and sort both sides on each comparison."""
+    def is_valid_sub_node(self, sub_node):
+        if sub_node.perform_rule_indx is not None:
+            sub_node.time = self.rules[sub_node.perform_rule_indx].get("time", 0)
+            sub_node.cost = self.rules[sub_node.perform_rule_indx].get("cost", 0)
+            return True
+        for rule in self.rules:
+            if sorted(rule["target"]) == sorted(sub_node.target):
+                if sorted(rule["source"]) == sorted(sub_node.source):
+                    sub_node.time = rule.get("time", 0)
+                    sub_node.cost = rule.get("cost", 0)
+                    return True
+        return False
+
+def build_graphs(count: int, nodes: int, graph_type: str, seed: int):
+    """50-node graphs with the edge_config 3 edge range of gen_abs_task."""
+    random.seed(seed)
+    graphs = []
+    for _ in range(count):
+        m = random.randint(nodes, nodes * (nodes - 1) // 2)
+        graphs.append(generate_abstract_workflow(graph_type, nodes, m))
+    return graphs
+
+def build_subtasks(config: dict):
+    """One subtask per rule with shuffled sources, plus one that matches no rule."""
+    subtasks = []
+    for i, rule in enumerate(config["rules"]):
+        source = list(rule["source"])
+        random.shuffle(source)
+        subtasks.append(SubTTNode({"name": f"Subtask{i}", "source": source, "target": rule["target"], "dependencies": []}))
+    subtasks.append(SubTTNode({"name": "Invalid", "source": ["missing"], "target": [config["target"]], "dependencies": []}))
+    return subtasks
+
+def measure(env_cls, graphs, workload):
+    start = time.perf_counter()
+    matched = 0
+    for config, subtasks in zip(graphs, workload):
+        env = env_cls(config)
+        for subtask in subtasks:
+            matched += env.is_valid_sub_node(subtask)
+    return time.perf_counter() - start, matched
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare linear-scan and indexed rule lookup in TTEnv.is_valid_sub_node.")
+    parser.add_argument("--graphs", type=int, default=50)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--graph_type", type=str, default="random", help="random | tree (tree generation stalls on dense edge counts)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    graphs = build_graphs(args.graphs, args.nodes, args.graph_type, args.seed)
+    workload = [build_subtasks(config) for config in graphs]
+    lookups = sum(len(subtasks) for subtasks in workload)
+    print(f"{len(graphs)} graphs, {sum(len(g['rules']) for g in graphs)} rules, {lookups} lookups")
+    results = {}
+    for label, env_cls in (("linear scan", LinearScanEnv), ("indexed", TTEnv)):
+        best, matched = min(measure(env_cls, graphs, workload) for _ in range(args.repeat))
+        results[label] = best
+        print(f"{label:>11}: {best * 1000:.1f}ms, {best / lookups * 1e6:.2f}us per lookup, {matched} matched")
+    print(f"speedup: {results['linear scan'] / results['indexed']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import copy
+import multiprocessing
+import time
+from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.runner import TTRunner
+from src.agent.module.scheduler import ParallelScheduler
+from src.agent.module.subtask import SubTTNode
+
+class JoinOrderScheduler(ParallelScheduler):
+    """The previous dispatch loop: results are collected by joining processes in start order."""
+    def run(self, tasks):
+        self._prepare(tasks)
+        connections = {}
+        for task in self._dispatch():
+            self._start(task, connections)
+        while connections:
+            reader = next(iter(connections))
+            process, task_name, _, _ = connections.pop(reader)
+            process.join()
+            completed_task, result, span = reader.recv()
+            reader.close()
+            self._complete(task_name, result, span)
+            for task in self._dispatch():
+                self._start(task, connections)
+        return self._final_result()
+
+def build_skewed_plan(slow_time: int, chains: int, chain_length: int):
+    """One slow subtask started first, next to several chains of unit-time subtasks."""
+    rules = [{"source": ["N0"], "target": ["S"], "time": slow_time, "cost": 1}]
+    tasks = [{"name": "Slow", "source": ["N0"], "target": ["S"], "dependencies": []}]
+    for c in range(chains):
+        previous, previous_task = "N0", None
+        for i in range(chain_length):
+            material = f"C{c}_{i}"
+            rules.append({"source": [previous], "target": [material], "time": 1, "cost": 1})
+            name = f"Chain{c}_{i}"
+            tasks.append({
+                "name": name,
+                "source": [previous],
+                "target": [material],
+                "dependencies": [previous_task] if previous_task else [],
+            })
+            previous, previous_task = material, name
+    config = {"rules": rules, "initial_source": ["N0"], "target": "S"}
+    return config, tasks
+
+def measure(scheduler_cls, config, tasks, time_scale):
+    env = TTEnv(config)
+    nodes = [SubTTNode(task) for task in copy.deepcopy(tasks)]
+    for node in nodes:
+        env.is_valid_sub_node(node)
+    scheduler = scheduler_cls(TTRunner(None, None, time_scale=time_scale), env)
+    start = time.perf_counter()
+    scheduler.run(nodes)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare join-order and completion-order dispatch on a plan with skewed subtask times.")
+    parser.add_argument("--slow_time", type=int, default=20)
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--chain_length", type=int, default=10)
+    parser.add_argument("--time_scale", type=float, default=0.2, help="Seconds slept per unit of rule time.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method('spawn')
+    config, tasks = build_skewed_plan(args.slow_time, args.chains, args.chain_length)
+    ideal = max(args.slow_time, args.chain_length) * args.time_scale
+    print(f"{len(tasks)} subtasks, critical path {ideal:.2f}s")
+    for label, scheduler_cls in (("join-order", JoinOrderScheduler), ("completion-order", ParallelScheduler)):
+        best = min(measure(scheduler_cls, config, tasks, args.time_scale) for _ in range(args.repeat))
+        print(f"{label:>17}: makespan {best:.2f}s ({best / ideal:.2f}x critical path)")
+
+if __name__ == "__main__":
+    main()
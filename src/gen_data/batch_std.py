@@ -0,0 +1,264 @@
+import numpy as np
+from src.gen_data.std import _canonical_rule_ids, _expand_plan, convert_rules, min_time_cost_to_target
+
+# path counts above this are recomputed exactly instead of trusting int64
+_COUNT_LIMIT = float(2 ** 62)
+
+def _pack(task_info: dict):
+    """Flat rule tables for one graph, or None when only the exact solver reproduces its quirks.
+
+    That is: multi-target or sourceless rules, rules with identical content,
+    rules that produce an initial source, sources nothing produces, an
+    unproduced target, and times or costs that are not non-negative ints.
+    Materials are numbered with the initial sources first.
+    """
+    rules = task_info["rules"]
+    materials = {material: i for i, material in enumerate(dict.fromkeys(task_info["initial_source"]))}
+    initial = len(materials)
+    source_flat, source_len, targets, times, costs = [], [], [], [], []
+    for rule in rules:
+        target, sources = rule["target"], rule["source"]
+        if len(target) != 1 or not sources:
+            return None
+        targets.append(materials.setdefault(target[0], len(materials)))
+        for source in sources:
+            source_flat.append(materials.setdefault(source, len(materials)))
+        source_len.append(len(sources))
+        times.append(rule["time"])
+        costs.append(rule["cost"])
+    if not rules or min(targets) < initial or len(materials) != initial + len(set(targets)):
+        return None
+    if task_info["target"] not in materials or materials[task_info["target"]] < initial:
+        return None
+    if not all(type(value) is int and value >= 0 for value in times + costs):
+        return None
+    if _canonical_rule_ids(rules) != list(range(len(rules))):
+        return None
+    return {
+        "material_ids": materials,
+        "materials": len(materials),
+        "initial": initial,
+        "target": materials[task_info["target"]],
+        "source_flat": source_flat,
+        "source_len": source_len,
+        "targets": targets,
+        "times": times,
+        "costs": costs,
+    }
+
+def batch_min_time_cost(task_infos: list, plans: bool = False) -> list:
+    """``min_time_cost_to_target`` for every graph, solved together.
+
+    Returns ``(min_time, min_cost, path_count)`` per graph, or with ``plans``
+    the full six-tuple including the best and second-best plans.
+
+    All graphs share one set of flat NumPy tables. Every material's depth
+    (its longest rule chain from an initial source) is found for the whole
+    batch at once, then the batch is relaxed one depth at a time: each step
+    computes every rule's finish time, path count and plan, a bitset of
+    rules packed into uint64 words, and each material keeps the rule with the
+    smallest (time, plan cost), first rule on ties. Plans are rebuilt from
+    those winning rules only for the target. Graphs the tables cannot
+    represent exactly fall back to ``min_time_cost_to_target``.
+    """
+    width = 6 if plans else 3
+    results = [None] * len(task_infos)
+    packed, positions = [], []
+    for g, task_info in enumerate(task_infos):
+        graph = _pack(task_info)
+        if graph is None:
+            results[g] = min_time_cost_to_target(task_info)[:width]
+        else:
+            packed.append(graph)
+            positions.append(g)
+    if packed:
+        for g, graph, result in zip(positions, packed, _solve_packed(packed)):
+            if result is None:
+                results[g] = min_time_cost_to_target(task_infos[g])[:width]
+            elif plans:
+                results[g] = result[:3] + _rebuild_plans(task_infos[g]["rules"], graph, *result[3:])
+            else:
+                results[g] = result[:3]
+    return results
+
+def _rebuild_plans(rules: list, graph: dict, winner: list, target_rules: list, target_times: list, target_costs: list) -> tuple:
+    """Best and second-best plans and the second-best time, as ``min_time_cost_to_target`` builds them.
+
+    Each material's plan is the plan of its winning rule over its sources'
+    plans, so every material gets one shared node. The second-best entry
+    replays the target's rules in firing order.
+    """
+    materials, initial = graph["material_ids"], graph["initial"]
+    nodes = {}
+
+    def node(material):
+        stack = [material]
+        while stack:
+            current = stack[-1]
+            if current < initial or current in nodes:
+                stack.pop()
+                continue
+            sources = [materials[source] for source in rules[winner[current]]["source"]]
+            missing = [source for source in sources if source >= initial and source not in nodes]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            nodes[current] = (winner[current], tuple(nodes.get(source) for source in sources), None, None)
+        return nodes.get(material)
+
+    best = second = None
+    best_time = best_cost = second_time = float('inf')
+    for i, new_time, new_cost in zip(target_rules, target_times, target_costs):
+        if new_time < best_time or (new_time == best_time and new_cost < best_cost):
+            second, second_time = best, best_time
+            best, best_time, best_cost = i, new_time, new_cost
+        else:
+            second, second_time = i, new_time
+    rule_ids = list(range(len(rules)))
+    best_plan = node(graph["target"])
+    second_plan = None
+    if second is not None:
+        second_plan = (second, tuple(node(materials[source]) for source in rules[second]["source"]), None, None)
+    return (
+        convert_rules(_expand_plan(best_plan, rules, rule_ids)),
+        convert_rules(_expand_plan(second_plan, rules, rule_ids)),
+        second_time,
+    )
+
+def _solve_packed(graphs: list) -> list:
+    """Results for packed graphs, None for the ones that have to be solved exactly."""
+    material_count = np.array([graph["materials"] for graph in graphs])
+    rule_count = np.array([len(graph["targets"]) for graph in graphs])
+    material_offset = np.cumsum(material_count) - material_count
+    rule_offset = np.cumsum(rule_count) - rule_count
+    rule_graph = np.repeat(np.arange(len(graphs)), rule_count)
+    rule_local = np.arange(rule_count.sum()) - rule_offset[rule_graph]
+
+    lengths = np.concatenate([graph["source_len"] for graph in graphs]).astype(np.int64)
+    source_start = np.cumsum(lengths) - lengths
+    sources = np.concatenate([graph["source_flat"] for graph in graphs]) + np.repeat(material_offset[rule_graph], lengths)
+    targets = np.concatenate([graph["targets"] for graph in graphs]) + material_offset[rule_graph]
+
+    # longest-chain depth; a graph still changing after as many rounds as it has materials has a cycle
+    by_target = np.argsort(targets, kind="stable")
+    target_start = np.flatnonzero(np.r_[True, np.diff(targets[by_target]) != 0])
+    produced = targets[by_target][target_start]
+    depth = np.zeros(material_count.sum(), dtype=np.int64)
+    changed = np.zeros(len(depth), dtype=bool)
+    for _ in range(int(material_count.max()) + 1):
+        rule_depth = np.maximum.reduceat(depth[sources], source_start) + 1
+        new_depth = depth.copy()
+        new_depth[produced] = np.maximum.reduceat(rule_depth[by_target], target_start)
+        changed = new_depth != depth
+        depth = new_depth
+        if not changed.any():
+            break
+    material_graph = np.repeat(np.arange(len(graphs)), material_count)
+    cyclic = np.zeros(len(graphs), dtype=bool)
+    cyclic[material_graph[changed]] = True
+    if cyclic.any():
+        acyclic = [graph for graph, bad in zip(graphs, cyclic) if not bad]
+        solved = iter(_solve_packed(acyclic) if acyclic else [])
+        return [None if bad else next(solved) for bad in cyclic]
+
+    # rules grouped by depth, then target, in rule order, with their sources reordered to match
+    level = depth[targets]
+    order = np.lexsort((np.arange(len(targets)), targets, level))
+    lengths = lengths[order]
+    start = np.cumsum(lengths) - lengths
+    sources = sources[np.repeat(source_start[order] - start, lengths) + np.arange(lengths.sum())]
+    source_start = start
+    targets, level, rule_graph, rule_local = targets[order], level[order], rule_graph[order], rule_local[order]
+    times = np.concatenate([graph["times"] for graph in graphs]).astype(np.int64)[order]
+    costs = np.concatenate([graph["costs"] for graph in graphs]).astype(np.int64)[order]
+    word = rule_local >> 6
+    bit = np.left_shift(np.uint64(1), (rule_local & 63).astype(np.uint64))
+
+    # a plan's cost is the sum over cost bits b of 2**b times the number of its rules with bit b set
+    words = int(rule_count.max() + 63) // 64
+    cost_masks = []
+    for b in range(int(costs.max()).bit_length()):
+        selected = (costs >> b) & 1 == 1
+        mask = np.zeros((len(graphs), words), dtype=np.uint64)
+        np.bitwise_or.at(mask, (rule_graph[selected], word[selected]), bit[selected])
+        cost_masks.append(mask)
+
+    time = np.zeros(len(depth), dtype=np.int64)
+    cost = np.zeros(len(depth), dtype=np.int64)
+    count = np.ones(len(depth), dtype=np.int64)
+    count_estimate = np.ones(len(depth))
+    plan = np.zeros((len(depth), words), dtype=np.uint64)
+    winner = np.zeros(len(depth), dtype=np.int64)
+    rule_time = np.zeros(len(targets), dtype=np.int64)
+    rule_cost = np.zeros(len(targets), dtype=np.int64)
+    is_target = np.zeros(len(depth), dtype=bool)
+    is_target[material_offset + [graph["target"] for graph in graphs]] = True
+
+    bounds = np.searchsorted(level, np.arange(1, int(level.max()) + 2))
+    source_bounds = np.r_[source_start, lengths.sum()]
+    with np.errstate(over="ignore"):
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            if first == last:
+                continue
+            rules = np.arange(first, last)
+            level_sources = sources[source_bounds[first]:source_bounds[last]]
+            level_start = source_start[first:last] - source_bounds[first]
+            new_time = np.maximum.reduceat(time[level_sources], level_start) + times[rules]
+            new_count = np.multiply.reduceat(count[level_sources], level_start)
+            new_estimate = np.multiply.reduceat(count_estimate[level_sources], level_start)
+            new_plan = np.bitwise_or.reduceat(plan[level_sources], level_start, axis=0)
+            new_plan[np.arange(len(rules)), word[rules]] |= bit[rules]
+
+            target = targets[rules]
+            group_start = np.flatnonzero(np.r_[True, target[1:] != target[:-1]])
+            group_size = np.diff(np.r_[group_start, len(rules)])
+            group = np.repeat(np.arange(len(group_start)), group_size)
+            best_time = np.minimum.reduceat(new_time, group_start)
+
+            # only rules that reach the best time compete on cost; every rule of a graph target is costed for the second-best plan
+            candidates = np.flatnonzero((new_time == best_time[group]) | is_target[target])
+            candidate_plan = new_plan[candidates]
+            candidate_graph = rule_graph[rules[candidates]]
+            candidate_cost = np.zeros(len(candidates), dtype=np.int64)
+            for b, mask in enumerate(cost_masks):
+                candidate_cost += _popcount(candidate_plan & mask[candidate_graph]).sum(axis=1) << b
+            ranked = np.lexsort((candidates, candidate_cost, new_time[candidates], group[candidates]))
+            keep = np.r_[True, group[candidates][ranked][1:] != group[candidates][ranked][:-1]]
+            best = ranked[keep]
+
+            produced = target[group_start]
+            time[produced] = best_time
+            cost[produced] = candidate_cost[best]
+            plan[produced] = candidate_plan[best]
+            winner[produced] = rule_local[rules[candidates[best]]]
+            rule_time[rules] = new_time
+            rule_cost[rules[candidates]] = candidate_cost
+            count[produced] = np.add.reduceat(new_count, group_start)
+            count_estimate[produced] = np.add.reduceat(new_estimate, group_start)
+
+    starts = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]])
+    group_start = np.zeros(len(depth), dtype=np.int64)
+    group_end = np.zeros(len(depth), dtype=np.int64)
+    group_start[targets[starts]] = starts
+    group_end[targets[starts]] = np.r_[starts[1:], len(targets)]
+    results = []
+    for graph, offset in zip(graphs, material_offset):
+        target = offset + graph["target"]
+        if count_estimate[target] >= _COUNT_LIMIT:
+            results.append(None)
+            continue
+        target_rules = slice(group_start[target], group_end[target])
+        results.append((
+            int(time[target]), int(cost[target]), int(count[target]),
+            winner[offset:offset + graph["materials"]].tolist(),
+            rule_local[target_rules].tolist(), rule_time[target_rules].tolist(), rule_cost[target_rules].tolist(),
+        ))
+    return results
+
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).astype(np.int64)
+    return _BYTE_BITS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
@@ -1,13 +1,47 @@
 import random
 import os, json
 import argparse
-from cyaron import Graph
+import bisect
+import functools
+import itertools
+import multiprocessing
 from src.gen_data.std import min_time_cost_to_target
 
+@functools.lru_cache(maxsize=8)
+def _cumulative_weights(a, b):
+    return list(itertools.accumulate(x + 1 for x in range(a, b + 1)))
+
 def get_random_int(a, b):
-    numbers = list(range(a, b + 1))
-    weights = [x + 1 for x in numbers]
-    return random.choices(numbers, weights=weights, k=1)[0]
+    """An int in [a, b] with weight x + 1, drawn exactly as ``random.choices`` would draw it."""
+    cum_weights = _cumulative_weights(a, b)
+    # random.choices rebuilds the weights on every call; the draw itself is one random() and a bisect
+    return a + bisect.bisect(cum_weights, random.random() * (cum_weights[-1] + 0.0), 0, len(cum_weights) - 1)
+
+class _Fenwick:
+    """Marked indices in [0, n) with O(log n) marking and k-th marked index lookup."""
+
+    def __init__(self, n):
+        self.tree = [0] * (n + 1)
+        self.total = 0
+        self.top = 1 << n.bit_length()
+
+    def add(self, index):
+        self.total += 1
+        index += 1
+        while index < len(self.tree):
+            self.tree[index] += 1
+            index += index & -index
+
+    def find(self, k):
+        """The k-th (0-based) marked index."""
+        position = 0
+        step = self.top
+        while step:
+            if position + step < len(self.tree) and self.tree[position + step] <= k:
+                position += step
+                k -= self.tree[position]
+            step >>= 1
+        return position
 
 def generate_tree(n):
     parent = [None] * n
@@ -16,14 +50,19 @@ def generate_tree(n):
     max_depth = 3
     depth = [None] * n
     depth[0] = 0
+    # shallower[t] marks the nodes with depth < t, so the valid parents are its marks in index order
+    shallower = {t: _Fenwick(n) for t in range(1, max_depth + 1)}
+    for t in shallower:
+        shallower[t].add(0)
     
     for i in range(1, n):
         max_parent_depth = min(depth[i - 1] + 1, max_depth)
         
-        valid_parents = [p for p in range(i) if depth[p] < max_parent_depth]
+        valid_parents = shallower[max_parent_depth]
         
-        if valid_parents:
-            p = random.choice(valid_parents)
+        if valid_parents.total:
+            # the same draw as random.choice over the list of valid parents
+            p = valid_parents.find(random.randrange(valid_parents.total))
             parent[i] = p
             edges.append((i, p))
             depth[i] = depth[p] + 1
@@ -32,10 +71,13 @@ def generate_tree(n):
             parent[i] = p
             edges.append((i, p))
             depth[i] = 1
+        for t in range(depth[i] + 1, max_depth + 1):
+            shallower[t].add(i)
     
     return edges, parent
 
 def add_ancestor_edges(edges, n, parent, num_ancestor_edges):
+    edge_set = set(edges)
     num = 0
     while num < num_ancestor_edges:
         u = get_random_int(1, n - 1)
@@ -51,31 +93,36 @@ def add_ancestor_edges(edges, n, parent, num_ancestor_edges):
         while t > 0:
             p = parent[p]
             t -= 1
-        if (u, p) not in edges:
+        if (u, p) not in edge_set:
             edges.append((u, p))
+            edge_set.add((u, p))
             num += 1
         
     return edges
 
 def is_cross_nodes(edges, n, u, v, parent):
+    """Whether u and v are distinct, not yet joined and neither is the other's ancestor; ``edges`` may be a set."""
     if u < v:
         u, v = v, u
     if (u, v) in edges:
         return False
+    # children have larger indices, so only v can be u's ancestor; trees are at most max_depth deep
     while u is not None and u != v:
         u = parent[u]
     return u is None
 
 def add_cross_edges(edges, n, parent, num_cross_edges):
+    edge_set = set(edges)
     for _ in range(num_cross_edges):
         u = get_random_int(0, n - 1)
         v = get_random_int(0, n - 1)
-        while not is_cross_nodes(edges, n, u, v, parent):
+        while not is_cross_nodes(edge_set, n, u, v, parent):
             u = get_random_int(0, n - 1)
             v = get_random_int(0, n - 1)
         if u < v:
             u, v = v, u
         edges.append((u, v))
+        edge_set.add((u, v))
     return edges
 
 def generate_graph(n, m):
@@ -89,12 +136,42 @@ def generate_graph(n, m):
         results.append((n - e[0], n - e[1]))    
     return results
 
+def generate_dag(n, m):
+    """Edges (u, v), u < v, of ``cyaron.Graph.DAG(n, m, repeated_edges=False)``, drawing the same random numbers.
+
+    A random spanning tree (each node i > 1 gets a parent in [1, i)) plus
+    distinct random edges, listed by start node and then in insertion order.
+    The unit edge weights cyaron draws are drawn and dropped.
+    """
+    if m < n - 1:
+        raise ValueError("the number of edges of connected graph must more than the number of nodes - 1")
+    if m > n * (n - 1) // 2:
+        raise ValueError(f"a DAG with {n} vertexes has at most {n * (n - 1) // 2} distinct edges")
+    out = [[] for _ in range(n + 1)]
+    used = set()
+    for i in range(2, n + 1):
+        u = random.randrange(1, i)
+        random.randint(1, 1)
+        out[u].append(i)
+        used.add((u, i))
+    count = n - 1
+    while count < m:
+        u = random.randint(1, n)
+        v = random.randint(1, n)
+        if u > v:
+            u, v = v, u
+        if u == v or (u, v) in used:
+            continue
+        random.randint(1, 1)
+        out[u].append(v)
+        used.add((u, v))
+        count += 1
+    return [(u, v) for u in range(1, n + 1) for v in out[u]]
+
 def generate_abstract_workflow(graph_type, n_nodes, m_edges, group_size_range=(1, 1), time_range=(1, 50), cost_range=(1, 1)):
     edges = []
     if graph_type == "random":
-        graph = Graph.DAG(n_nodes, m_edges, repeated_edges=False)
-        edges = list(graph.iterate_edges())
-        edges = [(e.start, e.end) for e in edges]
+        edges = generate_dag(n_nodes, m_edges)
     elif graph_type == "tree":
         edges = generate_graph(n_nodes, m_edges)
         
@@ -134,12 +211,13 @@ def generate_abstract_workflow(graph_type, n_nodes, m_edges, group_size_range=(1
             workflow.append(transformation)
     
     source_nodes = set()
-    target_nodes = set()
+    # ordered, so the choice below does not depend on string hashing
+    target_nodes = {}
     for rule in workflow:
         source_nodes.update(rule["source"])
-        target_nodes.add(rule["target"][0])
-    tail_nodes = target_nodes - source_nodes
-    new_target = random.choice(list(tail_nodes))
+        target_nodes[rule["target"][0]] = None
+    tail_nodes = [node for node in target_nodes if node not in source_nodes]
+    new_target = random.choice(tail_nodes)
     
     return {
         "rules": workflow,
@@ -147,12 +225,117 @@ def generate_abstract_workflow(graph_type, n_nodes, m_edges, group_size_range=(1
         "target": new_target
     }
 
+def edge_count(graph_type, edge_config, n):
+    m = 0
+    if edge_config == 1:
+        if graph_type == "random":
+            m = random.randint(n * 2, n * 3)
+        elif graph_type == "tree":
+            m = random.randint(n, n * 3 // 2)
+    elif edge_config == 2:
+        m = random.randint(n * (n - 1) // 3, n * (n - 1) // 2)
+    elif edge_config == 3:
+        m = random.randint(n, n * (n - 1) // 2)
+    return m
+
+def solve_candidates(workflows, batch_size=1):
+    if batch_size > 1:
+        from src.gen_data.batch_std import batch_min_time_cost
+        return batch_min_time_cost(workflows, plans=True)
+    return [min_time_cost_to_target(workflow) for workflow in workflows]
+
+def make_item(item_id, n, m, abstract_workflow, solution):
+    """The dataset item for a solved candidate, or None if it has a single path or no second-best plan."""
+    min_time, min_cost, path_count, plan, feasible, feasible_time = solution
+    if path_count <= 1 or len(feasible) == 0:
+        return None
+    return {
+        "id": item_id,
+        "node_count": n,
+        "edge_count": m,
+        "question": abstract_workflow,
+        "answer": plan,
+        "feasible": feasible,
+        "min_time": min_time,
+        "feasible_time": feasible_time,
+        "min_cost": min_cost,
+        "path_count": path_count
+    }
+
+def generate_items(config, nodes, edge_config, graph_type, batch_size=1):
+    """Items drawn one after another from the global ``random`` state."""
+    count = 0
+    while count < config:
+        print(f"Generating {count + 1}/{config}...")
+        batch = []
+        while len(batch) < batch_size:
+            n = random.randint(nodes[0], nodes[1])        
+            m = edge_count(graph_type, edge_config, n)
+            batch.append((n, m, generate_abstract_workflow(graph_type, n, m)))
+        # candidates are drawn in the same order either way, so the accepted items do not depend on the batch size
+        solutions = solve_candidates([workflow for _, _, workflow in batch], batch_size)
+        for (n, m, abstract_workflow), solution in zip(batch, solutions):
+            item = make_item(count + 1, n, m, abstract_workflow, solution)
+            if item is None or count == config:
+                continue
+            count += 1
+            yield item
+
+def generate_seeded_items(item_ids, seed, nodes, edge_config, graph_type, batch_size=1):
+    """Items with the given ids, each drawn from its own ``random`` stream seeded with ``f"{seed}:{id}"``.
+
+    The generators draw from the global ``random`` module, so each item's
+    state is swapped in around its draws and the caller's state is restored
+    after.
+    An item does not depend on which other items are generated with it.
+    """
+    outer_state = random.getstate()
+    states = {}
+    for item_id in item_ids:
+        random.seed(f"{seed}:{item_id}")
+        states[item_id] = random.getstate()
+    items = {}
+    pending = list(item_ids)
+    try:
+        while pending:
+            candidates = []
+            for item_id in pending:
+                random.setstate(states[item_id])
+                n = random.randint(nodes[0], nodes[1])
+                m = edge_count(graph_type, edge_config, n)
+                candidates.append((item_id, n, m, generate_abstract_workflow(graph_type, n, m)))
+                states[item_id] = random.getstate()
+            solutions = solve_candidates([workflow for _, _, _, workflow in candidates], batch_size)
+            pending = []
+            for (item_id, n, m, abstract_workflow), solution in zip(candidates, solutions):
+                item = make_item(item_id, n, m, abstract_workflow, solution)
+                if item is None:
+                    pending.append(item_id)
+                else:
+                    items[item_id] = item
+    finally:
+        random.setstate(outer_state)
+    return [items[item_id] for item_id in item_ids]
+
+def dump_items(items, path):
+    """Write items as they arrive; the file is byte-identical to ``json.dump(list(items), f, ensure_ascii=False, indent=4)``."""
+    with open(path, 'w') as f:
+        empty = True
+        for item in items:
+            f.write("[\n    " if empty else ",\n    ")
+            f.write(json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+            empty = False
+        f.write("[]" if empty else "\n]")
+
 def main():
     parser = argparse.ArgumentParser(description="Generate test data for the abstract workflow task.")
     parser.add_argument("--config", type=int, help="Number of test cases to generate", default=1000)
     parser.add_argument("--nodes", type=int, nargs=2, help="Number of nodes in the graph", default=(50, 50))
     parser.add_argument("--edge_config", type=int, help="Edge configuration", default=1)
     parser.add_argument("--graph_type", type=str, help="Type of graph to generate", default="tree")
+    parser.add_argument("--batch_size", type=int, help="Number of candidate graphs solved together (needs numpy when above 1)", default=1)
+    parser.add_argument("--seed", type=int, help="Base seed; item i is drawn from its own stream, so the output does not depend on --workers", default=None)
+    parser.add_argument("--workers", type=int, help="Number of generator processes (implies per-item seeding)", default=1)
     args = parser.parse_args()
     config = args.config
     nodes = args.nodes
@@ -168,44 +351,36 @@ def main():
             print("Exiting...")
             exit()
     
-    data = []
-    count = 0
-    while count < config:
-        print(f"Generating {count + 1}/{config}...")
-        n = random.randint(nodes[0], nodes[1])        
-        m = 0
-        if edge_config == 1:
-            if args.graph_type == "random":
-                m = random.randint(n * 2, n * 3)
-            elif args.graph_type == "tree":
-                m = random.randint(n, n * 3 // 2)
-        elif edge_config == 2:
-            m = random.randint(n * (n - 1) // 3, n * (n - 1) // 2)
-        elif edge_config == 3:
-            m = random.randint(n, n * (n - 1) // 2)
-        abstract_workflow = generate_abstract_workflow(args.graph_type, n, m)
-        min_time, min_cost, path_count, plan, feasible, feasible_time = min_time_cost_to_target(abstract_workflow)
-        if path_count <= 1 or len(feasible) == 0:
-            continue
-        count += 1
-        item = {
-            "id": count,
-            "node_count": n,
-            "edge_count": m,
-            "question": abstract_workflow,
-            "answer": plan,
-            "feasible": feasible,
-            "min_time": min_time,
-            "feasible_time": feasible_time,
-            "min_cost": min_cost,
-            "path_count": path_count
-        }
-        data.append(item)
-    
-    with open(test_file, 'w') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    if args.seed is None and args.workers == 1:
+        dump_items(generate_items(config, nodes, edge_config, args.graph_type, args.batch_size), test_file)
+        print(f"Data has been saved to {test_file}.")
+        return
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    print(f"Generating {config} items with seed {seed} on {args.workers} workers...")
+    task = functools.partial(
+        generate_seeded_items, seed=seed, nodes=nodes, edge_config=edge_config,
+        graph_type=args.graph_type, batch_size=args.batch_size,
+    )
+    chunk = max(args.batch_size, 1)
+    chunks = [range(start, min(start + chunk, config + 1)) for start in range(1, config + 1, chunk)]
+
+    def progress(results):
+        done = 0
+        for items in results:
+            for item in items:
+                yield item
+            done += len(items)
+            if done * 10 // config > (done - len(items)) * 10 // config:
+                print(f"Generated {done}/{config}")
+
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            dump_items(progress(pool.imap(task, chunks)), test_file)
+    else:
+        dump_items(progress(map(task, chunks)), test_file)
     print(f"Data has been saved to {test_file}.")
 
     
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,303 @@
+import heapq
+import math
+from src.gen_data.std import _expand_plan, convert_rules, make_hashable, min_time_cost_to_target
+
+class IncrementalSolver:
+    """``min_time_cost_to_target`` that follows rule edits instead of re-solving the graph.
+
+    Every material keeps the labels the full solve computes for it: earliest
+    time, plan (a node shared by everything downstream, as in
+    ``min_time_cost_to_target``), plan cost, path count and second-best plan.
+    An edit only relaxes the materials downstream of the rules it touches,
+    in order of their longest rule chain from an initial source, and stops
+    wherever a material's labels come out unchanged.
+
+    Rules are addressed by handle: the initial rules keep their index, added
+    rules get the next one, and handles stay valid when other rules are
+    removed. ``rules`` lists the live rules in handle order, so ``solve()``
+    always equals ``min_time_cost_to_target(solver.task_info)``. Graphs whose
+    quirks the labels do not model (multi-target or sourceless rules, rules
+    producing an initial source, identical rules, non-int costs, sources
+    nothing produces, cycles) are handed to the full solve until an edit
+    removes the quirk.
+    """
+
+    def __init__(self, task_info: dict):
+        self.initial_source = list(task_info["initial_source"])
+        self.target = task_info["target"]
+        self._initial = set(self.initial_source)
+        self._rules = []
+        self._producers = {}
+        self._consumers = {}
+        self._keys = {}
+        self._duplicates = 0
+        self._unsupported = set()
+        self._orphans = set()
+        self._cost_masks = {}
+        self._stale = True
+        for rule in task_info["rules"]:
+            self._rules.append(dict(rule))
+            self._attach(len(self._rules) - 1)
+        self._rebuild()
+
+    @property
+    def rules(self) -> list:
+        return [rule for rule in self._rules if rule is not None]
+
+    @property
+    def task_info(self) -> dict:
+        return {"rules": self.rules, "initial_source": self.initial_source, "target": self.target}
+
+    def add_rule(self, rule: dict) -> int:
+        """Append a rule and return its handle."""
+        self._rules.append(dict(rule))
+        handle = len(self._rules) - 1
+        self._attach(handle)
+        self._repair(handle, [], structural=True)
+        return handle
+
+    def remove_rule(self, handle: int):
+        targets = list(self._rule(handle)["target"])
+        self._detach(handle)
+        self._rules[handle] = None
+        self._repair(None, targets, structural=True)
+
+    def update_rule(self, handle: int, **changes):
+        """Change fields of a rule, e.g. ``update_rule(3, time=7)``; the rule keeps its place in the firing order."""
+        rule = self._rule(handle)
+        targets = list(rule["target"])
+        structural = any(key in changes for key in ("source", "target"))
+        self._detach(handle)
+        self._rules[handle] = {**rule, **changes}
+        self._attach(handle)
+        self._repair(handle, targets, structural)
+
+    def solve(self) -> tuple:
+        """The six values ``min_time_cost_to_target`` returns for the current rules."""
+        if self._stale and self._supported():
+            self._rebuild()
+        if self._stale:
+            return min_time_cost_to_target(self.task_info)
+        if self.target not in self._time:
+            return float('inf'), float('inf'), 0, [], [], float('inf')
+        handles = range(len(self._rules))
+        return (
+            self._time[self.target],
+            self._cost[self.target],
+            self._count[self.target],
+            convert_rules(_expand_plan(self._plan[self.target], self._rules, handles)),
+            convert_rules(_expand_plan(self._second_plan[self.target], self._rules, handles)),
+            self._second_time[self.target],
+        )
+
+    def _rule(self, handle: int) -> dict:
+        if not 0 <= handle < len(self._rules) or self._rules[handle] is None:
+            raise ValueError(f"No rule with handle {handle}")
+        return self._rules[handle]
+
+    # indices: producers, consumers, identical rules, unsupported rules, unproduced sources and cost masks
+
+    def _attach(self, handle: int):
+        rule = self._rules[handle]
+        key = make_hashable(rule)
+        self._keys[key] = self._keys.get(key, 0) + 1
+        if self._keys[key] == 2:
+            self._duplicates += 1
+        if (len(rule["target"]) != 1 or not rule["source"] or rule["target"][0] in self._initial
+                or not isinstance(rule["cost"], int)):
+            self._unsupported.add(handle)
+        for target in dict.fromkeys(rule["target"]):
+            producers = self._producers.setdefault(target, [])
+            producers.insert(self._position(producers, handle), handle)
+            self._check_orphan(target)
+        for source in dict.fromkeys(rule["source"]):
+            self._consumers.setdefault(source, []).append(handle)
+            self._check_orphan(source)
+        self._cost_masks[rule["cost"]] = self._cost_masks.get(rule["cost"], 0) | 1 << handle
+
+    def _detach(self, handle: int):
+        rule = self._rules[handle]
+        key = make_hashable(rule)
+        self._keys[key] -= 1
+        if self._keys[key] == 1:
+            self._duplicates -= 1
+        elif not self._keys[key]:
+            del self._keys[key]
+        self._unsupported.discard(handle)
+        for target in dict.fromkeys(rule["target"]):
+            self._producers[target].remove(handle)
+            self._check_orphan(target)
+        for source in dict.fromkeys(rule["source"]):
+            self._consumers[source].remove(handle)
+            self._check_orphan(source)
+        self._cost_masks[rule["cost"]] ^= 1 << handle
+        if not self._cost_masks[rule["cost"]]:
+            del self._cost_masks[rule["cost"]]
+
+    @staticmethod
+    def _position(handles: list, handle: int) -> int:
+        position = len(handles)
+        while position and handles[position - 1] > handle:
+            position -= 1
+        return position
+
+    def _check_orphan(self, material):
+        if self._consumers.get(material) and not self._producers.get(material) and material not in self._initial:
+            self._orphans.add(material)
+        else:
+            self._orphans.discard(material)
+
+    def _supported(self) -> bool:
+        return not (self._unsupported or self._orphans or self._duplicates)
+
+    def _cost_of(self, bits: int):
+        if len(self._cost_masks) <= 32:
+            return sum(cost * (bits & mask).bit_count() for cost, mask in self._cost_masks.items())
+        total = 0
+        while bits:
+            low = bits & -bits
+            total += self._rules[low.bit_length() - 1]["cost"]
+            bits ^= low
+        return total
+
+    # labels
+
+    def _rebuild(self):
+        """Label every material from scratch; stays stale when the rules have a cycle or unsupported quirks."""
+        self._stale = True
+        if not self._supported():
+            return
+        order = self._topological_order()
+        if order is None:
+            return
+        self._time = {source: 0 for source in self.initial_source}
+        self._cost = {source: 0 for source in self.initial_source}
+        self._plan = {source: None for source in self.initial_source}
+        self._count = {source: 1 for source in self.initial_source}
+        self._second_plan = {source: None for source in self.initial_source}
+        self._second_time = {source: 0 for source in self.initial_source}
+        self._depth = {source: 0 for source in self.initial_source}
+        for material in order:
+            if material not in self._initial:
+                self._update_depth(material)
+                self._relax(material)
+        self._stale = False
+
+    def _topological_order(self):
+        in_degree = {}
+        for rule in self.rules:
+            for target in rule["target"]:
+                in_degree[target] = in_degree.get(target, 0) + len(rule["source"])
+            for source in rule["source"]:
+                in_degree.setdefault(source, 0)
+        order = [material for material, degree in in_degree.items() if degree == 0]
+        for material in order:
+            for handle in self._consumers.get(material, []):
+                rule = self._rules[handle]
+                for target in rule["target"]:
+                    in_degree[target] -= rule["source"].count(material)
+                    if in_degree[target] == 0:
+                        order.append(target)
+        return order if len(order) == len(in_degree) else None
+
+    def _repair(self, handle, old_targets: list, structural: bool):
+        if self._stale:
+            return
+        if not self._supported():
+            self._stale = True
+            return
+        new_targets = self._rules[handle]["target"] if handle is not None else []
+        seeds = list(dict.fromkeys(old_targets + new_targets))
+        if structural:
+            cone = self._downstream(seeds)
+            sources = self._rules[handle]["source"] if handle is not None else []
+            if any(source in cone for source in sources) and any(
+                source in self._downstream(new_targets) for source in sources
+            ):
+                # the rule feeds on its own output
+                self._stale = True
+                return
+            for material in cone:
+                self._update_depth(material)
+        queue = [(self._depth.get(material, 0), material) for material in seeds]
+        heapq.heapify(queue)
+        queued = set(seeds)
+        while queue:
+            _, material = heapq.heappop(queue)
+            if self._relax(material):
+                for consumer in self._consumers.get(material, []):
+                    target = self._rules[consumer]["target"][0]
+                    if target not in queued:
+                        queued.add(target)
+                        heapq.heappush(queue, (self._depth[target], target))
+
+    def _downstream(self, seeds: list) -> list:
+        """Materials reachable from the seeds, sources before the materials they feed."""
+        postorder = []
+        visited = set(seeds)
+        for seed in seeds:
+            stack = [(seed, iter(self._consumers.get(seed, [])))]
+            while stack:
+                material, consumers = stack[-1]
+                for consumer in consumers:
+                    target = self._rules[consumer]["target"][0]
+                    if target not in visited:
+                        visited.add(target)
+                        stack.append((target, iter(self._consumers.get(target, []))))
+                        break
+                else:
+                    stack.pop()
+                    postorder.append(material)
+        return postorder[::-1]
+
+    def _update_depth(self, material):
+        producers = self._producers.get(material)
+        if producers:
+            self._depth[material] = 1 + max(
+                self._depth[source] for handle in producers for source in self._rules[handle]["source"]
+            )
+        else:
+            self._depth.pop(material, None)
+
+    def _relax(self, material) -> bool:
+        """Recompute a material's labels from its producers; True if anything downstream can see a change."""
+        old_plan = self._plan.get(material)
+        old = self._time.get(material), self._count.get(material)
+        producers = self._producers.get(material)
+        if not producers:
+            for labels in (self._time, self._cost, self._plan, self._count, self._second_plan, self._second_time):
+                labels.pop(material, None)
+            return old[0] is not None
+
+        best = second = None
+        best_time = best_cost = second_time = float('inf')
+        count = 0
+        for handle in producers:
+            rule = self._rules[handle]
+            new_time = max(self._time[source] for source in rule["source"]) + rule["time"]
+            source_plans = tuple(self._plan[source] for source in rule["source"])
+            bits = 1 << handle
+            for plan in source_plans:
+                if plan is not None:
+                    bits |= plan[2]
+            new_cost = self._cost_of(bits)
+            node = (handle, source_plans, bits, new_cost)
+            if new_time < best_time or (new_time == best_time and new_cost < best_cost):
+                second, second_time = best, best_time
+                best, best_time, best_cost = node, new_time, new_cost
+            else:
+                second, second_time = node, new_time
+            count += math.prod(self._count[source] for source in rule["source"])
+
+        if old_plan is not None and old_plan[0] == best[0] and old_plan[2:] == best[2:] and all(
+            a is b for a, b in zip(old_plan[1], best[1])
+        ):
+            # keep the node everything downstream already points at
+            best = old_plan
+        self._time[material] = best_time
+        self._cost[material] = best_cost
+        self._plan[material] = best
+        self._count[material] = count
+        self._second_plan[material] = second
+        self._second_time[material] = second_time
+        return best is not old_plan or (best_time, count) != old
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+# path of the SQLite file; unset leaves the reference solver uncached
+CACHE_ENV = "PLAN_OVER_GRAPH_SOLVER_CACHE"
+# bump whenever the reference solver's outputs change, so old entries are never served
+SOLVER_VERSION = 1
+
+def task_key(task_info: dict) -> str | None:
+    """Content hash of a task's rules, initial sources and target, or None when it is not JSON.
+
+    Object keys are sorted but list order is kept: rule order breaks ties
+    between equally good plans, so reordered rules are a different task.
+    """
+    try:
+        payload = json.dumps(
+            [SOLVER_VERSION, task_info["rules"], task_info["initial_source"], task_info["target"]],
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SolutionCache:
+    """Solutions of ``min_time_cost_to_target`` stored in a SQLite file, keyed by ``task_key``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        # WAL lets several generator processes read while one of them writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, solution TEXT NOT NULL)")
+
+    def get(self, key: str) -> tuple | None:
+        row = self._connection.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tuple(json.loads(row[0]))
+
+    def put(self, key: str, solution: tuple):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO solutions (key, solution) VALUES (?, ?)",
+            (key, json.dumps(solution, ensure_ascii=False)),
+        )
+
+    def close(self):
+        self._connection.close()
+
+_caches = {}
+
+def default_cache() -> SolutionCache | None:
+    """The cache named by ``PLAN_OVER_GRAPH_SOLVER_CACHE``, opened once per process."""
+    path = os.environ.get(CACHE_ENV)
+    if not path:
+        return None
+    # connections must not cross a fork, so worker processes open their own
+    key = (os.getpid(), path)
+    if key not in _caches:
+        _caches[key] = SolutionCache(path)
+    return _caches[key]
@@ -1,9 +1,21 @@
+import heapq
+import itertools
 import math, json
+from collections import deque
+from src.gen_data.solution_cache import default_cache, task_key
 
-def topological_sort(rules: list) -> list:
+def _fire_order(rules: list) -> list:
+    """Indices of the rules in the order they fire.
+
+    A material becomes available once the last source of every rule that
+    produces it is available; at that point its producing rules fire, in
+    rule order. Each step is O(1) amortised, so the whole pass is linear in
+    the size of the rules.
+    """
     graph = {}
     in_degree = {}
-    for rule in rules:
+    producers = {}
+    for i, rule in enumerate(rules):
         for source in rule["source"]:
             if source not in graph:
                 graph[source] = []
@@ -16,24 +28,31 @@ def topological_sort(rules: list) -> list:
             for target in rule["target"]:
                 graph[source].append(target)
                 in_degree[target] += 1
-    queue = [node for node in in_degree if in_degree[node] == 0]
-    result = []
-    exist_nodes = []
+        for target in rule["target"]:
+            indices = producers.setdefault(target, [])
+            if not indices or indices[-1] != i:
+                indices.append(i)
+    queue = deque(node for node in in_degree if in_degree[node] == 0)
+    order = []
+    exist_nodes = set()
     while queue:
-        node = queue.pop(0)
-        exist_nodes.append(node)
+        node = queue.popleft()
+        exist_nodes.add(node)
         for target in graph[node]:
             in_degree[target] -= 1
             if in_degree[target] == 0:
                 queue.append(target)
-                for rule in rules:
-                    if target in rule["target"]:
-                        if all(source in exist_nodes for source in rule["source"]):
-                            result.append(rule)
-    return result
+                for i in producers[target]:
+                    if all(source in exist_nodes for source in rules[i]["source"]):
+                        order.append(i)
+    return order
+
+def topological_sort(rules: list) -> list:
+    return [rules[i] for i in _fire_order(rules)]
 
 def convert_rules(rules: list) -> list:
     converted_rules = []
+    producers = {}
     for rule in rules:
         converted_rule = {
             "name": f"Subtask{len(converted_rules) + 1}",
@@ -42,108 +61,431 @@ def convert_rules(rules: list) -> list:
             "dependencies": []
         }
         converted_rules.append(converted_rule)
+        for target in dict.fromkeys(rule["target"]):
+            producers.setdefault(target, []).append(converted_rule["name"])
     for rule in converted_rules:
         for src in rule["source"]:
-            for dep_rule in converted_rules:
-                if src in dep_rule["target"]:
-                    rule["dependencies"].append(dep_rule["name"])
+            rule["dependencies"].extend(producers.get(src, []))
     return converted_rules
 
+def make_hashable(d):
+    if isinstance(d, dict):
+        return frozenset((k, make_hashable(v)) for k, v in d.items())
+    elif isinstance(d, list):
+        return tuple(make_hashable(i) for i in d)
+    return d
+
+def _expand_plan(plan, rules: list, rule_ids: list) -> list:
+    """Rules of a plan, each rule after the plans of its sources, duplicates dropped.
+
+    A plan is ``None`` for an initial source or ``(rule index, source plans,
+    rule bitset, cost)``. Source plans are the ones in place when the rule fired,
+    so the result matches concatenating and de-duplicating rule lists.
+    """
+    result = []
+    seen = set()
+    visited = set()
+    stack = [(plan, 0)] if plan is not None else []
+    while stack:
+        node, child = stack.pop()
+        source_plans = node[1]
+        while child < len(source_plans) and (source_plans[child] is None or id(source_plans[child]) in visited):
+            child += 1
+        if child < len(source_plans):
+            stack.append((node, child + 1))
+            stack.append((source_plans[child], 0))
+            continue
+        visited.add(id(node))
+        if rule_ids[node[0]] not in seen:
+            seen.add(rule_ids[node[0]])
+            result.append(rules[node[0]])
+    return result
+
+def _canonical_rule_ids(rules: list) -> list:
+    """Map each rule to the first rule with identical content; those count once towards a plan's cost."""
+    try:
+        if len({rule["id"] for rule in rules}) == len(rules):
+            # distinct ids, so no two rules can be identical
+            return list(range(len(rules)))
+    except (KeyError, TypeError):
+        pass
+    keys = {}
+    return [keys.setdefault(make_hashable(rule), i) for i, rule in enumerate(rules)]
+
+def _plan_coster(rules: list, rule_ids: list, max_masks: int = 32):
+    """Return a function that sums the costs of the rules in a bitset.
+
+    With few distinct costs this is one AND and popcount per cost value;
+    otherwise it walks the set bits.
+    """
+    masks = {}
+    for i, rule_id in enumerate(rule_ids):
+        if rule_id == i:
+            masks[rules[i]["cost"]] = masks.get(rules[i]["cost"], 0) | 1 << i
+    if len(masks) <= max_masks:
+        weighted = list(masks.items())
+        return lambda bits: sum(cost * (bits & mask).bit_count() for cost, mask in weighted)
+
+    def walk(bits):
+        total = 0
+        while bits:
+            low = bits & -bits
+            total += rules[low.bit_length() - 1]["cost"]
+            bits ^= low
+        return total
+    return walk
+
 def min_time_cost_to_target(task_info: dict) -> int:
+    """Earliest time to the target, its cost, the number of ways to reach it and its best and second-best plans.
+
+    With ``PLAN_OVER_GRAPH_SOLVER_CACHE`` set to a file path, solutions are
+    looked up in and saved to that SQLite cache, keyed by the task's content.
+    """
+    cache = default_cache()
+    key = task_key(task_info) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    solution = _min_time_cost_to_target(task_info)
+    if key is not None:
+        cache.put(key, solution)
+    return solution
+
+def _min_time_cost_to_target(task_info: dict) -> int:
+    """Uncached ``min_time_cost_to_target``.
+
+    Rules fire in ``_fire_order``; each one relaxes its targets using the
+    earliest times of its sources, breaking time ties on the cost of the
+    distinct rules in the plan. A plan is kept as a reference to the rule
+    that produced it and to its sources' plans, plus a bitset of the distinct
+    rules it uses, so unions and costs are word-parallel int operations. Only
+    the target's plans are expanded into rule lists.
+    """
     rules = task_info["rules"]
     initial_source = task_info["initial_source"]
     target = task_info["target"]
 
+    rule_ids = _canonical_rule_ids(rules)
+    cost_of_plan = _plan_coster(rules, rule_ids)
+
     time_map = {source: 0 for source in initial_source}
     cost_map = {source: 0 for source in initial_source}
-    rules_map = {source: [] for source in initial_source}
+    plan_map = {source: None for source in initial_source}
     path_count = {source: 1 for source in initial_source}
-    
-    second_rules_map = {source: [] for source in initial_source}
+
+    second_plan_map = {source: None for source in initial_source}
     second_time_map = {source: 0 for source in initial_source}
 
-    def get_time(node):
-        return time_map.get(node, float('inf'))
-    def get_cost(node):
-        return cost_map.get(node, float('inf'))
-    def get_rules(node):
-        return rules_map.get(node, [])
-    def make_hashable(d):
-        if isinstance(d, dict):
-            return frozenset((k, make_hashable(v)) for k, v in d.items())
-        elif isinstance(d, list):
-            return tuple(make_hashable(i) for i in d)
-        return d
-
-    def get_new_rules(rule):
-        new_rules = []
-        for src in rule["source"]:
-            new_rules.extend(get_rules(src))
-        new_rules.append(rule)
-        unique_rules = []
-        seen = set()
-        for r in new_rules:
-            r_tuple = make_hashable(r)
-            if r_tuple not in seen:
-                seen.add(r_tuple)
-                unique_rules.append(r)
-        return unique_rules
-    
-    def get_second_new_rules(rule):
-        new_rules = []
-        for src in rule["source"]:
-            new_rules.extend(second_rules_map.get(src, []))
-        new_rules.append(rule)
-        unique_rules = []
-        seen = set()
-        for r in new_rules:
-            r_tuple = make_hashable(r)
-            if r_tuple not in seen:
-                seen.add(r_tuple)
-                unique_rules.append(r)
-        return unique_rules
-
-    sorted_rules = topological_sort(rules)
-    
-    for rule in sorted_rules:
+    for i in _fire_order(rules):
+        rule = rules[i]
         if not all(source in time_map for source in rule["source"]):
             raise ValueError("Invalid rule")
-        source_time = max(get_time(src) for src in rule["source"])
+        source_time = max(time_map[src] for src in rule["source"])
         new_time = source_time + rule["time"]
-        new_rules = get_new_rules(rule)
-        new_cost = sum(rule["cost"] for rule in new_rules)
+        source_plans = tuple(plan_map.get(src) for src in rule["source"])
+        new_bits = 1 << rule_ids[i]
+        for plan in source_plans:
+            if plan is not None:
+                new_bits |= plan[2]
+        new_cost = cost_of_plan(new_bits)
+        new_plan = (i, source_plans, new_bits, new_cost)
         new_path_count = math.prod(path_count[src] for src in rule["source"])
         for target_node in rule["target"]:
-            if new_time < get_time(target_node):
-                second_time_map[target_node] = get_time(target_node)
-                second_rules_map[target_node] = get_rules(target_node)
+            current_time = time_map.get(target_node, float('inf'))
+            if new_time < current_time or (new_time == current_time and new_cost < cost_map.get(target_node, float('inf'))):
+                second_time_map[target_node] = current_time
+                second_plan_map[target_node] = plan_map.get(target_node)
 
                 time_map[target_node] = new_time
-                rules_map[target_node] = new_rules
+                plan_map[target_node] = new_plan
                 cost_map[target_node] = new_cost
-            elif new_time == get_time(target_node):
-                if new_cost < get_cost(target_node):
-                    second_time_map[target_node] = get_time(target_node)
-                    second_rules_map[target_node] = get_rules(target_node)
-
-                    cost_map[target_node] = new_cost
-                    rules_map[target_node] = new_rules
-                else:
-                    second_time_map[target_node] = new_time
-                    second_rules_map[target_node] = new_rules
             else:
                 second_time_map[target_node] = new_time
-                second_rules_map[target_node] = new_rules
-
+                second_plan_map[target_node] = new_plan
 
             if target_node not in path_count:
                 path_count[target_node] = new_path_count
             else:                
                 path_count[target_node] += new_path_count            
     
-    converted_rules = convert_rules(get_rules(target))
-    second_best_converted_rules = convert_rules(second_rules_map.get(target, []))
-    return time_map.get(target, float('inf')), cost_map.get(target, float('inf')), path_count.get(target, 0), converted_rules, second_best_converted_rules, second_time_map[target]
+    converted_rules = convert_rules(_expand_plan(plan_map.get(target), rules, rule_ids))
+    second_best_converted_rules = convert_rules(_expand_plan(second_plan_map.get(target), rules, rule_ids))
+    return time_map.get(target, float('inf')), cost_map.get(target, float('inf')), path_count.get(target, 0), converted_rules, second_best_converted_rules, second_time_map.get(target, float('inf'))
+
+def _best_plan_under(rules, order, rule_ids, cost_of_plan, initial_source, target, fixed, forbidden, cost_first=False):
+    """Earliest-time plan for the target when some materials' rules are fixed or forbidden.
+
+    Initial sources are always taken as given. With ``cost_first`` each
+    material takes its cheapest plan instead, breaking ties on time. Returns
+    ``(time, cost, plan)`` or None when the constraints leave the target
+    unreachable.
+    """
+    time_map = {source: 0 for source in initial_source}
+    cost_map = {source: 0 for source in initial_source}
+    plan_map = {source: None for source in initial_source}
+    for i in order:
+        rule = rules[i]
+        if not all(source in time_map for source in rule["source"]):
+            continue
+        new_time = max(time_map[src] for src in rule["source"]) + rule["time"]
+        source_plans = tuple(plan_map[src] for src in rule["source"])
+        new_bits = 1 << rule_ids[i]
+        for plan in source_plans:
+            if plan is not None:
+                new_bits |= plan[2]
+        new_cost = cost_of_plan(new_bits)
+        for target_node in rule["target"]:
+            if target_node in fixed and fixed[target_node] != i:
+                continue
+            if i in forbidden.get(target_node, ()) or plan_map.get(target_node, 0) is None:
+                continue
+            current = (time_map.get(target_node, float('inf')), cost_map.get(target_node, float('inf')))
+            if ((new_cost, new_time) < current[::-1]) if cost_first else ((new_time, new_cost) < current):
+                time_map[target_node] = new_time
+                cost_map[target_node] = new_cost
+                plan_map[target_node] = (i, source_plans, new_bits, new_cost)
+    if target not in time_map:
+        return None
+    return time_map[target], cost_map[target], plan_map[target]
+
+def _plan_choices(plan, rules: list, target: str) -> list:
+    """(material, rule index) for every material a plan produces, consumers before producers."""
+    choices = []
+    queue = deque([(target, plan)])
+    seen = {target}
+    while queue:
+        material, node = queue.popleft()
+        if node is None:
+            continue
+        choices.append((material, node[0]))
+        for source, source_plan in zip(rules[node[0]]["source"], node[1]):
+            if source not in seen:
+                seen.add(source)
+                queue.append((source, source_plan))
+    return choices
+
+def k_best_plans(task_info: dict, k: int | None = None):
+    """Yield ``(time, cost, plan)`` for distinct plans to the target, best first.
+
+    A plan picks one rule for every material it produces. Plans come out in
+    non-decreasing makespan; equal makespans are ordered by the cost of the
+    plan the solver builds for each branch, using the same tie-break as
+    ``min_time_cost_to_target``, which is not guaranteed to be the cheapest
+    plan with that makespan. Plans are produced lazily with Lawler's scheme.
+    Each yielded plan splits the rest of its branch: for the i-th material it
+    produces (target first), the rules of the first i - 1 materials are fixed
+    and its own rule is forbidden. Every branch is re-solved from scratch,
+    so asking for the next plan costs O(plan size x rules).
+
+    A multi-target rule can also produce materials the plan assigns to
+    other rules, so on graphs that have one the yielded time is the
+    replayed makespan of the plan's rules (as in ``pareto_frontier``), plans
+    with a rule the target does not need are skipped, and the makespan
+    order only holds for the solver's bound, not for the replayed times.
+    A rule set is yielded at most once.
+    """
+    rules = task_info["rules"]
+    initial_source = task_info["initial_source"]
+    target = task_info["target"]
+    rule_ids = _canonical_rule_ids(rules)
+    cost_of_plan = _plan_coster(rules, rule_ids)
+    order = list(dict.fromkeys(_fire_order(rules)))
+    position = {i: p for p, i in enumerate(order)}
+    multi_target = any(len(rule["target"]) > 1 for rule in rules)
+
+    def solve(fixed, forbidden):
+        return _best_plan_under(rules, order, rule_ids, cost_of_plan, initial_source, target, fixed, forbidden)
+
+    def replay(bits):
+        return _rule_set_time(rules, bits, position, initial_source, target)
+
+    counter = itertools.count()
+    heap = []
+    best = solve({}, {})
+    if best is not None:
+        heap.append((best[0], best[1], next(counter), best[2], {}, {}))
+    produced = 0
+    seen = set()
+    while heap and (k is None or produced < k):
+        time, cost, _, plan, fixed, forbidden = heapq.heappop(heap)
+        bits = plan[2] if plan is not None else 0
+        if multi_target:
+            time = replay(bits)
+        if bits not in seen and not (multi_target and _has_redundant_rule(bits, time, replay)):
+            yield time, cost, convert_rules(_expand_plan(plan, rules, rule_ids))
+            produced += 1
+        seen.add(bits)
+        branch_fixed = dict(fixed)
+        for material, rule_indx in _plan_choices(plan, rules, target):
+            if material not in fixed:
+                branch_forbidden = dict(forbidden)
+                branch_forbidden[material] = forbidden.get(material, frozenset()) | {rule_indx}
+                result = solve(branch_fixed, branch_forbidden)
+                if result is not None:
+                    heapq.heappush(heap, (result[0], result[1], next(counter), result[2], dict(branch_fixed), branch_forbidden))
+            branch_fixed[material] = rule_indx
+
+def _has_redundant_rule(bits: int, time, replay) -> bool:
+    """True if some rule in ``bits`` can be dropped without delaying the target past ``time``."""
+    rest = bits
+    while rest:
+        low = rest & -rest
+        if replay(bits ^ low) <= time:
+            return True
+        rest ^= low
+    return False
+
+def _add_label(labels: list, label: tuple) -> bool:
+    """Insert ``(time, cost, bits, plan)`` unless a label with no later time and a subset of its rules exists.
+
+    Dominance is on rule sets rather than costs: a cheaper label is not
+    better when its rules overlap less with what other sources need.
+    """
+    time, _, bits, _ = label
+    for other in labels:
+        if other[0] <= time and other[2] & ~bits == 0:
+            return False
+    labels[:] = [other for other in labels if not (time <= other[0] and bits & ~other[2] == 0)]
+    labels.append(label)
+    return True
+
+def _cap_labels(labels: list, max_labels: int) -> list:
+    """Keep the labels on the time/cost frontier first, then the fastest of the rest."""
+    ranked = sorted(labels, key=lambda label: (label[0], label[1]))
+    frontier, rest = [], []
+    best_cost = float('inf')
+    for label in ranked:
+        if label[1] < best_cost:
+            best_cost = label[1]
+            frontier.append(label)
+        else:
+            rest.append(label)
+    return (frontier + rest)[:max_labels]
+
+def pareto_frontier(task_info: dict, max_labels: int | None = 64) -> tuple:
+    """All plans to the target that no other plan beats on both makespan and cost.
+
+    Returns ``(frontier, exact)``: ``frontier`` is a list of ``(time, cost,
+    plan)`` sorted by increasing time and decreasing cost, with plans in
+    ``convert_rules`` format. Each material keeps a set of labels, one per
+    partial plan, and drops a label only when another has no later time and
+    a subset of its rules. Rule sets count shared ancestors once, so this is
+    the pruning that cannot lose a frontier plan. Label sets larger than
+    ``max_labels`` are cut down; ``exact`` is False if that happened. Use
+    ``max_labels=None`` for no limit.
+    """
+    rules = task_info["rules"]
+    initial_source = task_info["initial_source"]
+    target = task_info["target"]
+    rule_ids = _canonical_rule_ids(rules)
+    cost_of_plan = _plan_coster(rules, rule_ids)
+    order = list(dict.fromkeys(_fire_order(rules)))
+    position = {i: p for p, i in enumerate(order)}
+
+    # only materials the target can be built from need labels
+    producers = {}
+    for i in order:
+        for target_node in rules[i]["target"]:
+            producers.setdefault(target_node, []).append(i)
+    useful = {target}
+    stack = [target]
+    while stack:
+        for i in producers.get(stack.pop(), []):
+            for source in rules[i]["source"]:
+                if source not in useful:
+                    useful.add(source)
+                    stack.append(source)
+
+    # optimistic time and cost still needed after a material is made: the
+    # cheapest/fastest chain of rules from it to the target
+    remaining_time = {target: 0}
+    remaining_cost = {target: 0}
+    for i in reversed(order):
+        rule = rules[i]
+        after = [t for t in rule["target"] if t in remaining_time]
+        if not after:
+            continue
+        rule_time = rule["time"] + min(remaining_time[t] for t in after)
+        rule_cost = rule["cost"] + min(remaining_cost[t] for t in after)
+        for source in rule["source"]:
+            remaining_time[source] = min(remaining_time.get(source, rule_time), rule_time)
+            remaining_cost[source] = min(remaining_cost.get(source, rule_cost), rule_cost)
+
+    # complete plans found up front; a partial plan that cannot beat one of them is dropped
+    incumbents = []
+    for cost_first in (False, True):
+        found = _best_plan_under(rules, order, rule_ids, cost_of_plan, initial_source, target, {}, {}, cost_first)
+        if found is not None:
+            incumbents.append(found)
+
+    def hopeless(time, cost, material):
+        time += remaining_time[material]
+        cost += remaining_cost[material]
+        return any(best_time <= time and best_cost <= cost for best_time, best_cost, _ in incumbents)
+
+    labels = {source: [(0, 0, 0, None)] for source in initial_source}
+    exact = True
+    for i in order:
+        rule = rules[i]
+        if not any(target_node in useful for target_node in rule["target"]):
+            continue
+        if not all(source in labels for source in rule["source"]):
+            continue
+        # combine the sources' labels one at a time, pruning the partial products
+        partial = [(0, 0, 1 << rule_ids[i], ())]
+        for source in rule["source"]:
+            combined = []
+            for time, _, bits, plans in partial:
+                for source_time, _, source_bits, source_plan in labels[source]:
+                    merged = bits | source_bits
+                    merged_time = max(time, source_time)
+                    merged_cost = cost_of_plan(merged)
+                    if all(hopeless(merged_time + rule["time"], merged_cost, t) for t in rule["target"] if t in useful):
+                        continue
+                    _add_label(combined, (merged_time, merged_cost, merged, plans + (source_plan,)))
+            if max_labels is not None and len(combined) > max_labels:
+                combined = _cap_labels(combined, max_labels)
+                exact = False
+            partial = combined
+        for target_node in rule["target"]:
+            if target_node in initial_source or target_node not in useful:
+                continue
+            node_labels = labels.setdefault(target_node, [])
+            for time, cost, bits, plans in partial:
+                _add_label(node_labels, (time + rule["time"], cost, bits, (i, plans, bits, cost)))
+            if max_labels is not None and len(node_labels) > max_labels:
+                labels[target_node] = _cap_labels(node_labels, max_labels)
+                exact = False
+
+    points = {}
+    found = [(time, cost, plan[2] if plan is not None else 0, plan) for time, cost, plan in incumbents]
+    for _, cost, bits, plan in labels.get(target, []) + found:
+        # a label may run two rules for one material; its real makespan can only be earlier
+        time = _rule_set_time(rules, bits, position, initial_source, target)
+        if (time, cost) not in points:
+            points[(time, cost)] = plan
+    frontier = []
+    for (time, cost), plan in sorted(points.items(), key=lambda item: item[0]):
+        if not frontier or cost < frontier[-1][1]:
+            frontier.append((time, cost, convert_rules(_expand_plan(plan, rules, rule_ids)) if plan is not None else []))
+    return frontier, exact
+
+def _rule_set_time(rules: list, bits: int, position: dict, initial_source: list, target: str):
+    """Earliest time of the target when exactly the rules in ``bits`` run."""
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    time_map = {source: 0 for source in initial_source}
+    for i in sorted(indices, key=position.__getitem__):
+        rule = rules[i]
+        if all(source in time_map for source in rule["source"]):
+            new_time = max(time_map[src] for src in rule["source"]) + rule["time"]
+            for target_node in rule["target"]:
+                time_map[target_node] = min(time_map.get(target_node, new_time), new_time)
+    return time_map.get(target, float('inf'))
 
 def main():
     task_info = {"rules": [{ "source": ["N1"], "target": ["N2"], "time": 3, "cost": 1 }, { "source": ["N3"], "target": ["N4"], "time": 3, "cost": 1 }, { "source": ["N2"], "target": ["N5"], "time": 4, "cost": 1 }, { "source": ["N4", "N5"], "target": ["N6"], "time": 2, "cost": 1 }, { "source": ["N2"], "target": ["N6"], "time": 8, "cost": 1 }, { "source": ["N7"], "target": ["N8"], "time": 5, "cost": 1 }, { "source": ["N4"], "target": ["N8"], "time": 1, "cost": 1 }, { "source": ["N6", "N8"], "target": ["N9"], "time": 2, "cost": 1 }, { "source": ["N1"], "target": ["N9"], "time": 15, "cost": 1 }, ], "initial_source": ["N1", "N3", "N7"], "target": "N9"}
@@ -33,4 +33,8 @@ handler.setFormatter(formatter)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
-logger.addHandler(handler)
\ No newline at end of file
+logger.addHandler(handler)
+
+# one line per TTEnv commit; quiet unless a run asks for it (main.py --log_commits)
+commit_logger = logger.getChild("commits")
+commit_logger.setLevel(logging.WARNING)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+VIRTUAL_PID = 0
+
+class ChromeTracer:
+    """Collect scheduler events and write them as Chrome trace-event JSON.
+
+    Wall-clock events use ``time.time()`` so spans recorded inside worker
+    processes line up with the scheduler's own events. Virtual-clock spans go
+    to a separate "virtual clock" process, one row per scheduled plan, with
+    one unit of rule time drawn as one millisecond. The output opens in
+    Perfetto or chrome://tracing.
+    """
+    def __init__(self):
+        self.origin = time.time()
+        self.events = []
+        self.plans = 0
+        self.context = {}
+        self._lock = threading.Lock()
+        self._emit({"name": "process_name", "ph": "M", "pid": VIRTUAL_PID, "tid": 0, "args": {"name": "virtual clock"}})
+
+    def _emit(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+
+    def _ts(self, wall_time: float) -> float:
+        return (wall_time - self.origin) * 1e6
+
+    def _args(self, args: dict | None) -> dict:
+        return {**self.context, **(args or {})}
+
+    def begin_plan(self, label: str | None = None) -> int:
+        """Open a new virtual-clock row and return its id."""
+        with self._lock:
+            self.plans += 1
+            plan_id = self.plans
+        if label is None:
+            label = f"question {self.context['question']}" if "question" in self.context else f"plan {plan_id}"
+        self._emit({"name": "thread_name", "ph": "M", "pid": VIRTUAL_PID, "tid": plan_id, "args": {"name": label}})
+        return plan_id
+
+    def instant(self, name: str, category: str, args: dict | None = None, wall_time: float | None = None):
+        self._emit({
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "t",
+            "ts": self._ts(wall_time if wall_time is not None else time.time()),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self._args(args),
+        })
+
+    def span(self, name: str, category: str, start: float, finish: float, pid: int, tid: int, args: dict | None = None):
+        self._emit({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._ts(start),
+            "dur": max(finish - start, 0) * 1e6,
+            "pid": pid,
+            "tid": tid,
+            "args": self._args(args),
+        })
+
+    def virtual_span(self, name: str, plan_id: int, start: float, finish: float, args: dict | None = None):
+        self._emit({
+            "name": name,
+            "cat": "virtual",
+            "ph": "X",
+            "ts": start * 1000,
+            "dur": (finish - start) * 1000,
+            "pid": VIRTUAL_PID,
+            "tid": plan_id,
+            "args": self._args({"virtual_start": start, "virtual_finish": finish, **(args or {})}),
+        })
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+def trace_path_for(output_file: str) -> str:
+    """``<case>-output.json`` -> ``<case>-trace.json`` in the same directory."""
+    if output_file.endswith("-output.json"):
+        return output_file[: -len("-output.json")] + "-trace.json"
+    return os.path.splitext(output_file)[0] + "-trace.json"
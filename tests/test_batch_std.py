@@ -0,0 +1,55 @@
+import unittest
+
+from src.gen_data.batch_std import batch_min_time_cost
+from src.gen_data.std import min_time_cost_to_target
+from reference_tasks import example_task
+
+
+def _diamonds(count):
+    rules = []
+    for i in range(count):
+        rules += [
+            {"source": [f"M{i}"], "target": [f"A{i}"], "time": 1, "cost": 1},
+            {"source": [f"M{i}"], "target": [f"B{i}"], "time": 2, "cost": 1},
+            {"source": [f"A{i}"], "target": [f"M{i + 1}"], "time": 1, "cost": 1},
+            {"source": [f"B{i}"], "target": [f"M{i + 1}"], "time": 0, "cost": 2},
+        ]
+    return {"rules": rules, "initial_source": ["M0"], "target": f"M{count}"}
+
+
+class BatchSolverTests(unittest.TestCase):
+    def test_batch_matches_reference_solver(self):
+        cheaper_detour = example_task()
+        cheaper_detour["rules"][4]["time"] = 3
+        cheaper_detour["rules"][4]["cost"] = 0
+        graphs = [example_task(), cheaper_detour, _diamonds(5), {**example_task(), "target": "N6"}]
+
+        expected = [min_time_cost_to_target(graph) for graph in graphs]
+
+        self.assertEqual(batch_min_time_cost(graphs), [solution[:3] for solution in expected])
+        self.assertEqual(batch_min_time_cost(graphs, plans=True), expected)
+        self.assertEqual(batch_min_time_cost(graphs[:1]), [(11, 6, 5)])
+
+    def test_unpackable_graphs_fall_back_to_reference_solver(self):
+        multi_target = example_task()
+        multi_target["rules"][0]["target"] = ["N2", "N10"]
+        cycle = {
+            "rules": [
+                {"source": ["A"], "target": ["B"], "time": 1, "cost": 1},
+                {"source": ["B"], "target": ["A"], "time": 1, "cost": 1},
+                {"source": ["S"], "target": ["A"], "time": 1, "cost": 1},
+            ],
+            "initial_source": ["S"],
+            "target": "B",
+        }
+        # 2**70 paths do not fit the int64 counters
+        graphs = [multi_target, cycle, _diamonds(70), example_task()]
+
+        expected = [min_time_cost_to_target(graph) for graph in graphs]
+
+        self.assertEqual(batch_min_time_cost(graphs, plans=True), expected)
+        self.assertEqual(batch_min_time_cost(graphs)[2][2], 2 ** 70)
+
+
+if __name__ == "__main__":
+    unittest.main()
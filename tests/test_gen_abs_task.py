@@ -0,0 +1,70 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from src.gen_data.gen_abs_task import dump_items, generate_dag, generate_seeded_items, generate_tree, get_random_int
+
+
+class GenAbsTaskTests(unittest.TestCase):
+    def test_seeded_items_do_not_depend_on_grouping(self):
+        def generate(item_ids, batch_size=1):
+            return generate_seeded_items(item_ids, 11, (8, 12), 1, "random", batch_size)
+
+        random.seed(0)
+        state = random.getstate()
+        together = generate(range(1, 7))
+
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual([item["id"] for item in together], list(range(1, 7)))
+        self.assertEqual(generate(range(1, 4)) + generate(range(4, 7)), together)
+        self.assertEqual(generate([5]), together[4:5])
+        self.assertTrue(all(item["path_count"] > 1 and item["feasible"] for item in together))
+
+    def test_random_int_and_tree_draw_like_list_based_versions(self):
+        for seed in range(20):
+            random.seed(seed)
+            drawn = [get_random_int(2, 9) for _ in range(5)]
+            random.seed(seed)
+            expected = [random.choices(range(2, 10), weights=range(3, 11), k=1)[0] for _ in range(5)]
+            self.assertEqual(drawn, expected)
+
+            random.seed(seed)
+            edges, parent = generate_tree(40)
+            random.seed(seed)
+            depth = [0]
+            for i in range(1, 40):
+                valid_parents = [p for p in range(i) if depth[p] < min(depth[i - 1] + 1, 3)]
+                p = random.choice(valid_parents)
+                depth.append(depth[p] + 1)
+                self.assertEqual(edges[i - 1], (i, p))
+                self.assertEqual(parent[i], p)
+
+    def test_dag_is_a_spanning_tree_plus_distinct_forward_edges(self):
+        random.seed(3)
+        edges = generate_dag(30, 120)
+
+        self.assertEqual(len(edges), 120)
+        self.assertEqual(len(set(edges)), 120)
+        self.assertTrue(all(u < v for u, v in edges))
+        self.assertEqual({v for u, v in edges}, set(range(2, 31)))
+        self.assertEqual(edges, sorted(edges, key=lambda edge: edge[0]))
+        with self.assertRaises(ValueError):
+            generate_dag(5, 11)
+
+    def test_dump_items_matches_json_dump(self):
+        items = [{"id": 1, "question": {"rules": [], "target": "N1"}, "answer": ["ü"]}, {"id": 2, "answer": []}]
+        with tempfile.TemporaryDirectory() as directory:
+            for data in (items, []):
+                streamed = os.path.join(directory, "streamed.json")
+                dumped = os.path.join(directory, "dumped.json")
+                dump_items(iter(data), streamed)
+                with open(dumped, "w") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                with open(streamed) as a, open(dumped) as b:
+                    self.assertEqual(a.read(), b.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
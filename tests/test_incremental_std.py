@@ -0,0 +1,66 @@
+import unittest
+
+from src.gen_data.incremental_std import IncrementalSolver
+from src.gen_data.std import min_time_cost_to_target
+from reference_tasks import example_task
+
+
+class IncrementalSolverTests(unittest.TestCase):
+    def assertMatchesFullSolve(self, solver):
+        self.assertEqual(solver.solve(), min_time_cost_to_target(solver.task_info))
+
+    def test_rule_edits_match_full_solve(self):
+        solver = IncrementalSolver(example_task())
+        self.assertEqual(solver.solve()[:3], (11, 6, 5))
+
+        solver.update_rule(4, time=1)
+        self.assertMatchesFullSolve(solver)
+        self.assertEqual(solver.solve()[0], 6)
+        solver.update_rule(7, cost=9)
+        self.assertMatchesFullSolve(solver)
+
+        shortcut = solver.add_rule({"source": ["N3"], "target": ["N9"], "time": 1, "cost": 4})
+        self.assertMatchesFullSolve(solver)
+        self.assertEqual(solver.solve()[:3], (1, 4, 6))
+        solver.remove_rule(4)
+        self.assertMatchesFullSolve(solver)
+        solver.update_rule(shortcut, source=["N8"], time=2)
+        self.assertMatchesFullSolve(solver)
+        self.assertEqual([rule["time"] for rule in solver.rules][-1], 2)
+        with self.assertRaises(ValueError):
+            solver.update_rule(4, time=2)
+
+    def test_edits_outside_the_downstream_cone_leave_plans_untouched(self):
+        solver = IncrementalSolver(example_task())
+        plan_to_n6 = solver._plan["N6"]
+
+        solver.update_rule(5, time=1)
+
+        self.assertIs(solver._plan["N6"], plan_to_n6)
+        self.assertMatchesFullSolve(solver)
+
+    def test_unsupported_graphs_defer_to_full_solve_until_fixed(self):
+        solver = IncrementalSolver(example_task())
+
+        loop = solver.add_rule({"source": ["N9"], "target": ["N5"], "time": 1, "cost": 1})
+        self.assertTrue(solver._stale)
+        self.assertMatchesFullSolve(solver)
+        solver.remove_rule(loop)
+        self.assertMatchesFullSolve(solver)
+        self.assertFalse(solver._stale)
+
+        duplicate = solver.add_rule(dict(example_task()["rules"][0]))
+        self.assertMatchesFullSolve(solver)
+        solver.update_rule(duplicate, cost=0)
+        self.assertMatchesFullSolve(solver)
+        self.assertFalse(solver._stale)
+
+        orphan = solver.add_rule({"source": ["N10"], "target": ["N9"], "time": 1, "cost": 1})
+        with self.assertRaises(ValueError):
+            solver.solve()
+        solver.remove_rule(orphan)
+        self.assertMatchesFullSolve(solver)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from src.agent.main import preprocess_question
+
+
+class ResumeTests(unittest.TestCase):
+    def test_resume_skips_only_questions_that_were_scheduled(self):
+        questions = [{"id": i, "question": f"q{i}"} for i in range(4)]
+        previous = [
+            {"question": questions[0], "plan": "plan", "result": [12, 7]},
+            {"question": questions[1], "plan": None, "result": None},
+            {"question": questions[2], "plan": "plan", "result": None, "schedule_error": "Task Subtask1 failed"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            args = SimpleNamespace(test_file=os.path.join(tmp, "test.json"), output_file=os.path.join(tmp, "output.json"))
+            with open(args.test_file, "w") as f:
+                json.dump(questions, f)
+            with open(args.output_file, "w") as f:
+                json.dump(previous, f)
+
+            partial_results, remaining = preprocess_question(args)
+
+        self.assertEqual([result["question"]["id"] for result in partial_results], [0])
+        self.assertEqual([question["id"] for question in remaining], [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,388 @@
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+import unittest
+
+from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.runner import TTRunner
+from src.agent.module.scheduler import (
+    BatchScheduler,
+    InlineScheduler,
+    ParallelScheduler,
+    PooledScheduler,
+    SimulatedScheduler,
+    ThreadScheduler,
+    WorkerPool,
+    get_scheduler,
+)
+from src.agent.module.subtask import SubTTNode
+from src.gen_data.std import min_time_cost_to_target
+from src.utils.tracing import ChromeTracer
+
+
+def _make_env():
+    return TTEnv(
+        {
+            "rules": [
+                {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                {"source": ["N1"], "target": ["N3"], "time": 5, "cost": 2},
+                {"source": ["N2", "N3"], "target": ["N4"], "time": 7, "cost": 4},
+            ],
+            "initial_source": ["N1"],
+            "target": "N4",
+        }
+    )
+
+
+def _make_tasks():
+    return [
+        SubTTNode({"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": []}),
+        SubTTNode({"name": "Subtask2", "source": ["N1"], "target": ["N3"], "dependencies": []}),
+        SubTTNode(
+            {
+                "name": "Subtask3",
+                "source": ["N2", "N3"],
+                "target": ["N4"],
+                "dependencies": ["Subtask1", "Subtask2"],
+            }
+        ),
+    ]
+
+
+class _FlakyRunner:
+    """Fails (or hangs) on the first attempt of ``flaky_task``; the marker file survives process boundaries."""
+
+    def __init__(self, marker, flaky_task, hang=False, freeze=False):
+        self.marker = marker
+        self.flaky_task = flaky_task
+        self.hang = hang
+        self.freeze = freeze
+
+    def run(self, subtask):
+        if subtask.name == self.flaky_task and not os.path.exists(self.marker):
+            open(self.marker, "w").close()
+            if self.freeze:
+                os.kill(os.getpid(), signal.SIGSTOP)
+            if self.hang:
+                time.sleep(60)
+            raise RuntimeError("transient failure")
+        return subtask.name
+
+
+class _FailBesideHungRunner:
+    """Subtask1 fails at once while every other subtask hangs."""
+
+    def run(self, subtask):
+        if subtask.name == "Subtask1":
+            raise RuntimeError("permanent failure")
+        time.sleep(60)
+
+
+class SchedulerBackendTests(unittest.TestCase):
+    def _run(self, scheduler_cls):
+        env = _make_env()
+        scheduler = scheduler_cls(TTRunner(None, None), env)
+        return scheduler.run(_make_tasks())
+
+    def test_inline_scheduler_matches_env_result(self):
+        self.assertEqual(self._run(InlineScheduler), (12, 7))
+
+    def test_thread_scheduler_matches_env_result(self):
+        self.assertEqual(self._run(ThreadScheduler), (12, 7))
+
+    def test_process_scheduler_matches_inline_result(self):
+        self.assertEqual(self._run(ParallelScheduler), self._run(InlineScheduler))
+
+    def test_schedulers_do_not_mutate_planner_dependencies(self):
+        tasks = _make_tasks()
+        InlineScheduler(TTRunner(None, None), _make_env()).run(tasks)
+        self.assertEqual(tasks[2].dependencies, ["Subtask1", "Subtask2"])
+
+    def test_inline_scheduler_releases_large_fan_in_plan(self):
+        width = 3000
+        tasks = [SubTTNode({"name": f"Leaf{i}", "dependencies": []}) for i in range(width)]
+        tasks.append(SubTTNode({"name": "Join", "dependencies": [f"Leaf{i}" for i in range(width)]}))
+        scheduler = InlineScheduler(TTRunner(None, None), None)
+
+        self.assertEqual(scheduler.run(tasks), "Join")
+        self.assertEqual(scheduler.tasks, {})
+
+    def test_process_scheduler_releases_dependents_in_completion_order(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 10, "cost": 1},
+                    {"source": ["N1"], "target": ["N3"], "time": 1, "cost": 1},
+                    {"source": ["N3"], "target": ["N4"], "time": 1, "cost": 1},
+                ],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        tasks = [
+            SubTTNode({"name": "Slow", "source": ["N1"], "target": ["N2"], "dependencies": []}),
+            SubTTNode({"name": "Fast1", "source": ["N1"], "target": ["N3"], "dependencies": []}),
+            SubTTNode({"name": "Fast2", "source": ["N3"], "target": ["N4"], "dependencies": ["Fast1"]}),
+        ]
+        for task in tasks:
+            env.is_valid_sub_node(task)
+
+        ParallelScheduler(TTRunner(None, None, time_scale=0.05), env).run(tasks)
+
+        committed = [line.split()[0] for line in env.log.splitlines()]
+        self.assertEqual(committed, ["Fast1", "Fast2", "Slow"])
+
+    def test_pooled_scheduler_reuses_workers_across_plans(self):
+        pool = WorkerPool(TTRunner(None, None), max_workers=2)
+        try:
+            results = [PooledScheduler(None, _make_env(), pool=pool).run(_make_tasks()) for _ in range(3)]
+            report = pool.report()
+            children = multiprocessing.active_children()
+            self.assertTrue(children)
+            self.assertTrue(all(pool.owns(process) for process in children))
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(results, [(12, 7)] * 3)
+        self.assertEqual(report["tasks_dispatched"], 9)
+        self.assertEqual(report["spawns_saved"], 9 - report["workers"])
+        self.assertGreater(report["spawn_seconds"], 0)
+        self.assertEqual(report["estimated_spawn_seconds_saved"], report["spawns_saved"] * report["spawn_seconds"])
+        self.assertEqual(report["runner_pickle_bytes_saved"], report["spawns_saved"] * report["runner_bytes"])
+
+    def test_simulated_scheduler_reports_virtual_timeline(self):
+        env = _make_env()
+        tasks = _make_tasks()
+        for task in tasks:
+            env.is_valid_sub_node(task)
+        scheduler = SimulatedScheduler(None, env)
+
+        self.assertEqual(scheduler.run(tasks), (12, 7))
+        report = scheduler.report()
+        self.assertEqual(report["makespan"], env.material_earliest_time["N4"])
+        self.assertEqual(report["peak_parallelism"], 2)
+        self.assertIsNone(report["wall_clock_seconds"])
+        self.assertEqual(
+            sorted(report["timeline"], key=lambda entry: entry["name"]),
+            [
+                {"name": "Subtask1", "start": 0, "finish": 3},
+                {"name": "Subtask2", "start": 0, "finish": 5},
+                {"name": "Subtask3", "start": 5, "finish": 12},
+            ],
+        )
+
+    def test_worker_limit_prioritises_critical_path(self):
+        env = _make_env()
+        tasks = _make_tasks()
+        for task in tasks:
+            env.is_valid_sub_node(task)
+        scheduler = SimulatedScheduler(None, env, max_workers=1)
+
+        self.assertEqual(scheduler.run(tasks), (12, 7))
+        report = scheduler.report()
+        self.assertEqual(
+            report["timeline"],
+            [
+                {"name": "Subtask2", "start": 0, "finish": 5},
+                {"name": "Subtask1", "start": 5, "finish": 8},
+                {"name": "Subtask3", "start": 8, "finish": 15},
+            ],
+        )
+        self.assertEqual(report["makespan"], 15)
+        self.assertEqual(report["unconstrained_makespan"], 12)
+        self.assertEqual(report["peak_parallelism"], 1)
+
+    def test_worker_limit_applies_to_real_backends(self):
+        for scheduler_cls in (InlineScheduler, ThreadScheduler):
+            env = _make_env()
+            tasks = _make_tasks()
+            for task in tasks:
+                env.is_valid_sub_node(task)
+            scheduler = scheduler_cls(TTRunner(None, None), env, max_workers=1)
+
+            self.assertEqual(scheduler.run(tasks), (12, 7))
+            report = scheduler.report()
+            self.assertEqual((report["units"], report["makespan"], report["unconstrained_makespan"]), ("rule time", 15, 12))
+            self.assertGreaterEqual(report["wall_clock_seconds"], 0)
+            self.assertLess(report["wall_clock_seconds"], 5)
+
+    def test_simulated_makespan_matches_reference_plan(self):
+        task_info = {
+            "rules": [
+                {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                {"source": ["N3"], "target": ["N4"], "time": 3, "cost": 1},
+                {"source": ["N2"], "target": ["N5"], "time": 4, "cost": 1},
+                {"source": ["N4", "N5"], "target": ["N6"], "time": 2, "cost": 1},
+                {"source": ["N2"], "target": ["N6"], "time": 8, "cost": 1},
+                {"source": ["N7"], "target": ["N8"], "time": 5, "cost": 1},
+                {"source": ["N4"], "target": ["N8"], "time": 1, "cost": 1},
+                {"source": ["N6", "N8"], "target": ["N9"], "time": 2, "cost": 1},
+                {"source": ["N1"], "target": ["N9"], "time": 15, "cost": 1},
+            ],
+            "initial_source": ["N1", "N3", "N7"],
+            "target": "N9",
+        }
+        min_time, min_cost, _, plan, _, _ = min_time_cost_to_target(task_info)
+        env = TTEnv(task_info)
+        tasks = [SubTTNode(task) for task in plan]
+        for task in tasks:
+            env.is_valid_sub_node(task)
+        scheduler = SimulatedScheduler(None, env)
+
+        self.assertEqual(scheduler.run(tasks), (min_time, min_cost))
+        self.assertEqual(scheduler.makespan, min_time)
+
+    def test_batch_scheduler_keeps_question_envs_isolated(self):
+        broken_env = TTEnv(
+            {
+                "rules": [{"source": ["N9"], "target": ["N2"], "time": 1, "cost": 1}],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        broken_tasks = [SubTTNode({"name": "Subtask1", "source": ["N9"], "target": ["N2"], "dependencies": []})]
+        jobs = [(_make_tasks(), _make_env()), (broken_tasks, broken_env), (_make_tasks(), _make_env())]
+        for task in jobs[2][0]:
+            jobs[2][1].is_valid_sub_node(task)
+
+        batch = BatchScheduler(TTRunner(None, None), max_workers=4)
+        try:
+            results = batch.run(jobs)
+        finally:
+            batch.shutdown()
+
+        self.assertEqual(results[0], (12, 7))
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], (12, 7))
+        self.assertEqual(batch.plans[2].report()["makespan"], 12)
+
+    def test_batch_scheduler_shares_worker_pool(self):
+        pool = WorkerPool(TTRunner(None, None), max_workers=2)
+        batch = BatchScheduler(None, pool=pool)
+        try:
+            results = batch.run([(_make_tasks(), _make_env()) for _ in range(4)])
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(results, [(12, 7)] * 4)
+        self.assertEqual(pool.tasks_dispatched, 12)
+
+    def test_batch_scheduler_applies_per_plan_options_and_labels(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tracer = ChromeTracer()
+            runner = _FlakyRunner(os.path.join(tmp, "marker"), "Subtask3")
+            batch = BatchScheduler(
+                runner, max_workers=4, tracer=tracer,
+                scheduler_kwargs={"max_workers": 1, "max_task_retries": 1, "retry_backoff": 0.01},
+            )
+            jobs = [(_make_tasks(), _make_env()) for _ in range(2)]
+            for tasks, env in jobs:
+                for task in tasks:
+                    env.is_valid_sub_node(task)
+            try:
+                results = batch.run(jobs, labels=["q1", "q2"])
+            finally:
+                batch.shutdown()
+
+        self.assertEqual(results, [(12, 7)] * 2)
+        self.assertEqual(sum(len(plan.attempts) for plan in batch.plans), 1)
+        self.assertEqual(batch.plans[0].report()["makespan"], 15)
+        events = [event for event in tracer.to_dict()["traceEvents"] if event.get("cat") in ("dispatch", "commit", "retry")]
+        self.assertEqual(len([event for event in events if event["cat"] == "commit"]), 6)
+        labels = {plan.plan_id: label for plan, label in zip(batch.plans, ["q1", "q2"])}
+        for event in events:
+            self.assertEqual(event["args"]["question"], labels[event["args"]["plan"]])
+        self.assertNotIn("question", tracer.context)
+        with self.assertRaises(ValueError):
+            BatchScheduler(runner, max_workers=1, scheduler_kwargs={"task_timeout": 1.0})
+
+    def test_failed_subtask_is_retried_alone(self):
+        for scheduler_cls in (ParallelScheduler, InlineScheduler, ThreadScheduler):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = _make_env()
+                runner = _FlakyRunner(os.path.join(tmp, "marker"), "Subtask3")
+                scheduler = scheduler_cls(runner, env, max_task_retries=2, retry_backoff=0.01)
+
+                self.assertEqual(scheduler.run(_make_tasks()), (12, 7))
+                self.assertEqual(scheduler.attempts, {"Subtask3": 1})
+                self.assertEqual(len(env.log.splitlines()), 3)
+
+    def test_hung_subtask_times_out_and_is_retried(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = _FlakyRunner(os.path.join(tmp, "marker"), "Subtask1", hang=True)
+            scheduler = ParallelScheduler(runner, _make_env(), task_timeout=1.0, max_task_retries=1, retry_backoff=0.01)
+
+            start = time.time()
+            self.assertEqual(scheduler.run(_make_tasks()), (12, 7))
+            self.assertLess(time.time() - start, 30)
+            self.assertEqual(scheduler.attempts, {"Subtask1": 1})
+
+    def test_frozen_process_misses_heartbeat_and_is_retried(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = _FlakyRunner(os.path.join(tmp, "marker"), "Subtask2", freeze=True)
+            scheduler = ParallelScheduler(runner, _make_env(), heartbeat_timeout=1.0, max_task_retries=1, retry_backoff=0.01)
+
+            self.assertEqual(scheduler.run(_make_tasks()), (12, 7))
+            self.assertEqual(scheduler.attempts, {"Subtask2": 1})
+
+    def test_heartbeat_clock_starts_at_first_beat(self):
+        class _Stub:
+            killed = closed = False
+
+            def kill(self):
+                self.killed = True
+
+            def join(self):
+                pass
+
+            def close(self):
+                self.closed = True
+
+        scheduler = ParallelScheduler(None, _make_env(), heartbeat_timeout=0.5, max_task_retries=1, retry_backoff=0.01)
+        scheduler._prepare(_make_tasks())
+        starting, frozen = _Stub(), _Stub()
+        connections = {
+            starting: (starting, "Subtask1", None, multiprocessing.Value('d', 0.0)),
+            frozen: (frozen, "Subtask2", None, multiprocessing.Value('d', time.time() - 5)),
+        }
+
+        scheduler._check_liveness(connections)
+
+        self.assertEqual(list(connections), [starting])
+        self.assertFalse(starting.killed)
+        self.assertTrue(frozen.killed and frozen.closed)
+        self.assertEqual(scheduler.attempts, {"Subtask2": 1})
+
+    def test_subtask_failure_raises_once_retries_are_exhausted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = _FlakyRunner(os.path.join(tmp, "marker"), "Subtask1")
+            scheduler = InlineScheduler(runner, _make_env())
+
+            with self.assertRaises(RuntimeError):
+                scheduler.run(_make_tasks())
+
+    def test_failed_plan_kills_its_other_processes(self):
+        scheduler = ParallelScheduler(_FailBesideHungRunner(), _make_env())
+
+        start = time.time()
+        with self.assertRaises(RuntimeError):
+            scheduler.run(_make_tasks())
+
+        self.assertLess(time.time() - start, 30)
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_get_scheduler_resolves_names(self):
+        env = _make_env()
+        runner = TTRunner(None, None)
+        self.assertIsInstance(get_scheduler("inline", runner, env), InlineScheduler)
+        self.assertIsInstance(get_scheduler("threads", runner, env), ThreadScheduler)
+        self.assertIsInstance(get_scheduler("parallel", runner, env), ParallelScheduler)
+        self.assertIsInstance(get_scheduler("sim", runner, env), SimulatedScheduler)
+        with self.assertRaises(ValueError):
+            get_scheduler("unknown", runner, env)
+
+
+if __name__ == "__main__":
+    unittest.main()
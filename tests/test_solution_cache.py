@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.gen_data.solution_cache import CACHE_ENV, SolutionCache, default_cache, task_key
+from src.gen_data.std import min_time_cost_to_target
+
+
+def _task():
+    return {
+        "rules": [
+            {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+            {"source": ["N1"], "target": ["N3"], "time": 5, "cost": 2},
+            {"source": ["N2", "N3"], "target": ["N4"], "time": 7, "cost": 4},
+            {"source": ["N1"], "target": ["N4"], "time": 12, "cost": 1},
+        ],
+        "initial_source": ["N1"],
+        "target": "N4",
+    }
+
+
+class SolutionCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "solutions.sqlite")
+
+    def test_key_ignores_object_key_order_but_not_rule_order(self):
+        task = _task()
+        reordered_keys = dict(task, rules=[dict(reversed(list(rule.items()))) for rule in task["rules"]])
+        reordered_rules = dict(task, rules=task["rules"][::-1])
+
+        self.assertEqual(task_key(task), task_key(reordered_keys))
+        self.assertNotEqual(task_key(task), task_key(reordered_rules))
+        self.assertIsNone(task_key(dict(task, target={"N4"})))
+
+    def test_solver_reads_through_cache_when_enabled(self):
+        expected = min_time_cost_to_target(_task())
+        unreachable = dict(_task(), target="N9")
+
+        with mock.patch.dict(os.environ, {CACHE_ENV: self.path}):
+            self.assertEqual(min_time_cost_to_target(_task()), expected)
+            self.assertEqual(min_time_cost_to_target(_task()), expected)
+            self.assertEqual(min_time_cost_to_target(unreachable)[:3], (float("inf"), float("inf"), 0))
+            self.assertEqual(min_time_cost_to_target(unreachable)[5], float("inf"))
+            self.assertEqual((default_cache().hits, default_cache().misses), (2, 2))
+
+        cache = SolutionCache(self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.get(task_key(_task())), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertIsNone(cache.get(task_key(dict(_task(), target="N3"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+
+from src.agent.module.env.tt_env import TTEnv
+from src.gen_data.std import convert_rules, k_best_plans, min_time_cost_to_target, pareto_frontier, topological_sort
+from reference_tasks import example_task
+
+
+class ReferenceSolverTests(unittest.TestCase):
+    def test_solver_returns_best_and_second_best_plans(self):
+        min_time, min_cost, path_count, plan, second, second_time = min_time_cost_to_target(example_task())
+
+        self.assertEqual((min_time, min_cost, path_count, second_time), (11, 6, 5, 15))
+        self.assertEqual(
+            [(task["source"], task["dependencies"]) for task in plan],
+            [
+                (["N3"], []),
+                (["N1"], []),
+                (["N2"], ["Subtask2"]),
+                (["N4", "N5"], ["Subtask1", "Subtask3"]),
+                (["N4"], ["Subtask1"]),
+                (["N6", "N8"], ["Subtask4", "Subtask5"]),
+            ],
+        )
+        self.assertEqual(second, [{"name": "Subtask1", "source": ["N1"], "target": ["N9"], "dependencies": []}])
+
+    def test_rules_fire_once_their_sources_are_available(self):
+        rules = example_task()["rules"]
+
+        order = topological_sort(rules)
+
+        self.assertEqual(len(order), len(rules))
+        produced = {"N1", "N3", "N7"}
+        for rule in order:
+            self.assertTrue(set(rule["source"]) <= produced)
+            produced.update(rule["target"])
+
+    def test_shared_ancestors_are_costed_once(self):
+        task_info = {
+            "rules": [
+                {"id": 0, "source": ["N1"], "target": ["N2"], "time": 1, "cost": 5},
+                {"id": 1, "source": ["N2"], "target": ["N3"], "time": 1, "cost": 1},
+                {"id": 2, "source": ["N2"], "target": ["N4"], "time": 1, "cost": 1},
+                {"id": 3, "source": ["N3", "N4"], "target": ["N5"], "time": 1, "cost": 1},
+            ],
+            "initial_source": ["N1"],
+            "target": "N5",
+        }
+
+        min_time, min_cost, path_count, plan, _, _ = min_time_cost_to_target(task_info)
+
+        self.assertEqual((min_time, min_cost, path_count, len(plan)), (3, 8, 1, 4))
+        self.assertEqual(plan[-1]["dependencies"], ["Subtask2", "Subtask3"])
+
+    def test_identical_rules_are_costed_once(self):
+        rules = [
+            {"source": ["N1"], "target": ["N2"], "time": 1, "cost": 4},
+            {"source": ["N1"], "target": ["N2"], "time": 1, "cost": 4},
+        ] + [
+            {"source": ["N2"], "target": ["N3"], "time": 2, "cost": 100 + i} for i in range(40)
+        ]
+        task_info = {"rules": rules, "initial_source": ["N1"], "target": "N3"}
+
+        min_time, min_cost, path_count, plan, _, _ = min_time_cost_to_target(task_info)
+
+        self.assertEqual((min_time, min_cost, path_count), (3, 104, 80))
+        self.assertEqual(len(plan), 2)
+
+    def test_long_chain_does_not_recurse(self):
+        length = 5000
+        task_info = {
+            "rules": [
+                {"source": [f"N{i}"], "target": [f"N{i + 1}"], "time": 1, "cost": 1} for i in range(length)
+            ],
+            "initial_source": ["N0"],
+            "target": f"N{length}",
+        }
+
+        min_time, min_cost, path_count, plan, _, _ = min_time_cost_to_target(task_info)
+
+        self.assertEqual((min_time, min_cost, path_count, len(plan)), (length, length, 1, length))
+        self.assertEqual(plan[-1]["dependencies"], [f"Subtask{length - 1}"])
+
+    def test_k_best_plans_are_distinct_and_ranked(self):
+        min_time, min_cost, _, plan, _, _ = min_time_cost_to_target(example_task())
+
+        ranked = list(k_best_plans(example_task()))
+
+        self.assertEqual(ranked[0], (min_time, min_cost, plan))
+        self.assertEqual([time for time, _, _ in ranked], [11, 11, 13, 13, 15])
+        signatures = {frozenset((tuple(task["source"]), tuple(task["target"])) for task in tasks) for _, _, tasks in ranked}
+        self.assertEqual(len(signatures), len(ranked))
+        self.assertEqual(len(list(k_best_plans(example_task(), k=2))), 2)
+
+    def test_k_best_plans_replay_multi_target_rules(self):
+        task_info = {
+            "rules": [
+                {"source": ["N1"], "target": ["N2"], "time": 1, "cost": 1},
+                {"source": ["N1", "N2"], "target": ["N3"], "time": 2, "cost": 1},
+                {"source": ["N2"], "target": ["N3"], "time": 1, "cost": 1},
+                {"source": ["N1"], "target": ["N2", "N3"], "time": 5, "cost": 0},
+                {"source": ["N1"], "target": ["N3"], "time": 9, "cost": 1},
+            ],
+            "initial_source": ["N1"],
+            "target": "N3",
+        }
+
+        ranked = list(k_best_plans(task_info))
+
+        # plans adding an N3 rule to N1->[N2, N3] are redundant and skipped
+        self.assertEqual([(time, cost) for time, cost, _ in ranked], [(2, 2), (3, 2), (5, 0), (9, 1)])
+        scores = TTEnv(task_info).evaluate_plans([plan for _, _, plan in ranked])
+        self.assertEqual([(score["makespan"], score["cost"]) for score in scores], [(2, 2), (3, 2), (5, 0), (9, 1)])
+
+    def test_pareto_frontier_trades_makespan_for_cost(self):
+        frontier, exact = pareto_frontier(example_task())
+
+        self.assertTrue(exact)
+        self.assertEqual([(time, cost) for time, cost, _ in frontier], [(11, 6), (13, 4), (15, 1)])
+        scores = TTEnv(example_task()).evaluate_plans([plan for _, _, plan in frontier])
+        self.assertEqual([(score["makespan"], score["cost"]) for score in scores], [(11, 6), (13, 4), (15, 1)])
+
+    def test_convert_rules_links_every_producer(self):
+        converted = convert_rules(
+            [
+                {"source": ["N1"], "target": ["N2"]},
+                {"source": ["N1"], "target": ["N2"]},
+                {"source": ["N2"], "target": ["N3"]},
+            ]
+        )
+
+        self.assertEqual(converted[2]["dependencies"], ["Subtask1", "Subtask2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
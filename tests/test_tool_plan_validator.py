@@ -84,6 +84,28 @@ class ToolPlanValidatorTests(unittest.TestCase):
         with self.assertRaises(PlanValidationError):
             validate_tool_aware_plan(payload, self.registry)
 
+    def test_inputs_from_cycle_raises(self):
+        payload = {
+            "plan": [
+                {
+                    "name": "A",
+                    "goal": "Task A",
+                    "dependencies": [],
+                    "inputs_from": ["B"],
+                    "allowed_tools": ["search"],
+                },
+                {
+                    "name": "B",
+                    "goal": "Task B",
+                    "dependencies": ["A"],
+                    "allowed_tools": ["answer"],
+                },
+            ]
+        }
+
+        with self.assertRaises(PlanValidationError):
+            validate_tool_aware_plan(payload, self.registry)
+
 
 if __name__ == "__main__":
     unittest.main()
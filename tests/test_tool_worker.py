@@ -1,7 +1,10 @@
+import time
 import unittest
 
 from src.agent.module.tooling.registry import ToolRegistry
+from src.agent.module.tooling.runtime import ToolRuntimeError
 from src.agent.module.tooling.worker import ToolAwareWorker
+from src.utils.tracing import ChromeTracer
 
 
 class _FakeRuntime:
@@ -18,6 +21,27 @@ class _FakeRuntime:
         return {"tool": tool_name, "ok": True, "input": tool_input}
 
 
+class _SlowRuntime:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def run(self, tool_name, tool_input, timeout_sec=30):
+        time.sleep(self.delay)
+        return {"tool": tool_name, "ok": True}
+
+
+def _task(name, dependencies=(), timeout_sec=10):
+    return {
+        "task_name": name,
+        "goal": f"Run {name}",
+        "dependencies": list(dependencies),
+        "inputs_from": list(dependencies),
+        "toolbox": [{"name": "final_answer"}],
+        "budget": {"max_calls": 1, "max_cost": 0.0},
+        "timeout_sec": timeout_sec,
+    }
+
+
 class ToolWorkerTests(unittest.TestCase):
     def setUp(self):
         registry = ToolRegistry.from_dict(
@@ -104,6 +128,60 @@ class ToolWorkerTests(unittest.TestCase):
         self.assertEqual(self.runtime.calls[1][0], "fetch_url")
         self.assertEqual(self.runtime.calls[1][1]["url"], "https://example.com/page")
 
+    def test_independent_tasks_run_concurrently(self):
+        worker = ToolAwareWorker(self.worker.registry, _SlowRuntime(0.3), max_concurrency=3)
+        handoff = [_task("A"), _task("B"), _task("C"), _task("D", ["A", "B", "C"])]
+
+        start = time.time()
+        result = worker.execute_handoff(handoff)
+        elapsed = time.time() - start
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(result["completed_tasks"], 4)
+        traces = {trace["task_name"]: trace for trace in result["traces"]}
+        self.assertEqual(result["traces"][-1]["task_name"], "D")
+        for name in ("A", "B", "C"):
+            self.assertLessEqual(traces[name]["started_at"], traces[name]["finished_at"])
+            self.assertLessEqual(traces[name]["finished_at"], traces["D"]["started_at"])
+
+    def test_inputs_from_without_dependency_waits_for_producer(self):
+        worker = ToolAwareWorker(self.worker.registry, _SlowRuntime(0.2), max_concurrency=2)
+        consumer = dict(_task("B"), inputs_from=["A"])
+
+        result = worker.execute_handoff([_task("A"), consumer])
+
+        self.assertEqual([trace["task_name"] for trace in result["traces"]], ["A", "B"])
+        context = result["outputs"]["B"]["input"]["content"]["context"]
+        self.assertEqual(context, {"A": result["outputs"]["A"]})
+
+    def test_task_exceeding_timeout_raises(self):
+        worker = ToolAwareWorker(self.worker.registry, _SlowRuntime(3), max_concurrency=2)
+
+        start = time.time()
+        with self.assertRaises(ToolRuntimeError):
+            worker.execute_handoff([_task("A", timeout_sec=1)])
+        self.assertLess(time.time() - start, 2.5)
+
+    def test_execute_handoff_records_trace_events(self):
+        tracer = ChromeTracer()
+        self.worker.tracer = tracer
+        handoff = [
+            {
+                "task_name": "Subtask1",
+                "goal": "Compose final answer",
+                "dependencies": [],
+                "inputs_from": [],
+                "toolbox": [{"name": "final_answer"}],
+                "budget": {"max_calls": 1, "max_cost": 0.01},
+                "timeout_sec": 10,
+            },
+        ]
+
+        self.worker.execute_handoff(handoff)
+
+        events = [e for e in tracer.to_dict()["traceEvents"] if e.get("name") == "Subtask1"]
+        self.assertEqual(sorted(e["cat"] for e in events), ["commit", "dispatch", "run"])
+
 
 if __name__ == "__main__":
     unittest.main()
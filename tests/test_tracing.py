@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.runner import TTRunner
+from src.agent.module.scheduler import InlineScheduler, SimulatedScheduler
+from src.agent.module.subtask import SubTTNode
+from src.utils.tracing import ChromeTracer, trace_path_for
+
+
+def _make_env_and_tasks():
+    env = TTEnv(
+        {
+            "rules": [
+                {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                {"source": ["N2"], "target": ["N3"], "time": 4, "cost": 1},
+            ],
+            "initial_source": ["N1"],
+            "target": "N3",
+        }
+    )
+    tasks = [
+        SubTTNode({"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": []}),
+        SubTTNode({"name": "Subtask2", "source": ["N2"], "target": ["N3"], "dependencies": ["Subtask1"]}),
+    ]
+    for task in tasks:
+        env.is_valid_sub_node(task)
+    return env, tasks
+
+
+class ChromeTracerTests(unittest.TestCase):
+    def test_scheduler_records_dispatch_run_and_commit_per_subtask(self):
+        env, tasks = _make_env_and_tasks()
+        tracer = ChromeTracer()
+        tracer.context["question"] = 7
+        InlineScheduler(TTRunner(None, None), env, tracer=tracer).run(tasks)
+
+        events = tracer.to_dict()["traceEvents"]
+        for name in ("Subtask1", "Subtask2"):
+            categories = sorted(e["cat"] for e in events if e.get("name") == name)
+            self.assertEqual(categories, ["commit", "dispatch", "run", "virtual"])
+        virtual = {e["name"]: e for e in events if e.get("cat") == "virtual"}
+        self.assertEqual(virtual["Subtask2"]["args"]["virtual_start"], 3)
+        self.assertEqual(virtual["Subtask2"]["args"]["virtual_finish"], 7)
+        self.assertEqual(virtual["Subtask2"]["args"]["question"], 7)
+        run = next(e for e in events if e.get("cat") == "run")
+        self.assertEqual(run["pid"], os.getpid())
+
+    def test_simulated_scheduler_only_records_virtual_time(self):
+        env, tasks = _make_env_and_tasks()
+        tracer = ChromeTracer()
+        SimulatedScheduler(None, env, tracer=tracer).run(tasks)
+
+        categories = {e.get("cat") for e in tracer.to_dict()["traceEvents"]}
+        self.assertNotIn("run", categories)
+        self.assertIn("virtual", categories)
+
+    def test_dump_writes_trace_next_to_output(self):
+        self.assertEqual(trace_path_for("out/10-1-100-t-output.json"), "out/10-1-100-t-trace.json")
+        tracer = ChromeTracer()
+        tracer.instant("Subtask1", "dispatch")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            tracer.dump(path)
+            with open(path) as f:
+                payload = json.load(f)
+        self.assertEqual(payload["displayTimeUnit"], "ms")
+        self.assertEqual(payload["traceEvents"][-1]["name"], "Subtask1")
+
+
+if __name__ == "__main__":
+    unittest.main()
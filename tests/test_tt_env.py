@@ -1,7 +1,10 @@
+import json
+import logging
 import unittest
 
-from src.agent.module.env.tt_env import TTEnv
+from src.agent.module.env.tt_env import CommitRecord, TTEnv, TTEnvFactory
 from src.agent.module.subtask import SubTTNode
+from src.utils.logger_config import commit_logger
 
 
 class TTEnvTests(unittest.TestCase):
@@ -30,6 +33,24 @@ class TTEnvTests(unittest.TestCase):
         self.assertEqual(node.time, 3)
         self.assertEqual(node.cost, 2)
 
+    def test_rule_lookup_ignores_material_order_and_prefers_first_rule(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1", "N2"], "target": ["N3"], "time": 4, "cost": 1},
+                    {"source": ["N2", "N1"], "target": ["N3"], "time": 9, "cost": 5},
+                ],
+                "initial_source": ["N1", "N2"],
+                "target": "N3",
+            }
+        )
+        node = SubTTNode({"name": "Subtask1", "source": ["N2", "N1"], "target": "N3", "dependencies": []})
+        unknown = SubTTNode({"name": "Subtask2", "source": ["N1"], "target": ["N3"], "dependencies": []})
+
+        self.assertTrue(env.is_valid_sub_node(node))
+        self.assertEqual((node.time, node.cost), (4, 1))
+        self.assertFalse(env.is_valid_sub_node(unknown))
+
     def test_commit_with_rule_index_infers_source_target_and_accumulates_metrics(self):
         env = TTEnv(
             {
@@ -73,6 +94,261 @@ class TTEnvTests(unittest.TestCase):
         self.assertEqual(final_time, 12)
         self.assertEqual(total_cost, 7)
 
+    def test_commit_matches_its_rule_once(self):
+        env = TTEnv(
+            {
+                "rules": [{"source": ["N1"], "target": ["N2"], "time": 2, "cost": 1}],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        calls = []
+        match_rule = env._match_rule
+        env._match_rule = lambda sub_node: calls.append(sub_node.name) or match_rule(sub_node)
+
+        env.commit(SubTTNode({"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": []}))
+
+        self.assertEqual(calls, ["Subtask1"])
+        self.assertEqual(env.get_final_result(), (2, 1))
+
+    def test_reset_restores_initial_state_after_commits(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                    {"source": ["N2"], "target": ["N3"], "time": 2, "cost": 1},
+                ],
+                "initial_source": ["N1"],
+                "target": "N3",
+            }
+        )
+        for _ in range(2):
+            self.assertEqual(env.get_final_result(), (None, 0))
+            env.commit(SubTTNode({"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}))
+            env.commit(SubTTNode({"name": "Subtask2", "source": ["N2"], "target": ["N3"], "dependencies": []}))
+
+            self.assertEqual(env.available_materials, {"N1", "N2", "N3"})
+            self.assertEqual(env.synthesized_materials, {"N2", "N3"})
+            self.assertEqual(env.material_earliest_time, {"N1": 0, "N2": 3, "N3": 5})
+            self.assertEqual(env.get_final_result(), (5, 2))
+            env.reset()
+
+        self.assertEqual(env.available_materials, {"N1"})
+        self.assertEqual(env.material_earliest_time, {"N1": 0})
+
+    def test_evaluate_plans_scores_without_mutating_env(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                    {"source": ["N1"], "target": ["N3"], "time": 5, "cost": 2},
+                    {"source": ["N2", "N3"], "target": ["N4"], "time": 7, "cost": 4},
+                ],
+                "initial_source": ["N1"],
+                "target": "N4",
+            }
+        )
+        good = [
+            {"name": "Subtask3", "source": ["N3", "N2"], "target": "N4", "dependencies": ["Subtask1", "Subtask2"]},
+            {"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": []},
+            {"name": "Subtask2", "perform_rule_indx": 1, "dependencies": []},
+        ]
+        missing_source = [{"name": "Subtask1", "source": ["N2", "N3"], "target": ["N4"], "dependencies": []}]
+        unknown_rule = [{"name": "Subtask1", "source": ["N1"], "target": ["N4"], "dependencies": []}]
+        cycle = [
+            {"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": ["Subtask2"]},
+            {"name": "Subtask2", "source": ["N1"], "target": ["N3"], "dependencies": ["Subtask1"]},
+        ]
+
+        scores = env.evaluate_plans([good, {"plan": good}, missing_source, unknown_rule, cycle, "not json"])
+
+        self.assertEqual(scores[0], {"feasible": True, "makespan": 12, "cost": 7, "error": None})
+        self.assertEqual(scores[1], scores[0])
+        self.assertEqual([score["feasible"] for score in scores[2:]], [False] * 4)
+        self.assertIn("N2", scores[2]["error"])
+        self.assertIsNone(scores[3]["makespan"])
+        self.assertEqual(env.available_materials, {"N1"})
+        self.assertEqual(env.get_final_result(), (None, 0))
+
+    def test_evaluate_plans_scores_malformed_plans_as_infeasible(self):
+        env = TTEnv(
+            {
+                "rules": [{"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1}],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        good = [{"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}]
+        string_index = [{"name": "Subtask1", "perform_rule_indx": "0", "dependencies": []}]
+        float_index = [{"name": "Subtask1", "perform_rule_indx": 0.0, "dependencies": []}]
+        unhashable_dependency = [{"name": "Subtask1", "perform_rule_indx": 0, "dependencies": [["Subtask0"]]}]
+
+        scores = env.evaluate_plans([string_index, float_index, unhashable_dependency, good])
+
+        self.assertEqual([score["feasible"] for score in scores], [False, False, False, True])
+        self.assertTrue(all(score["error"] for score in scores[:3]))
+        self.assertEqual(scores[3]["makespan"], 3)
+
+    def test_evaluate_plans_matches_replay_through_commit(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 3, "cost": 1},
+                    {"source": ["N2"], "target": ["N1"], "time": 3, "cost": 2},
+                    {"source": ["N1"], "target": ["N3"], "time": 1, "cost": 4},
+                    {"source": ["N2"], "target": ["N3"], "time": 1, "cost": 8},
+                ],
+                "initial_source": ["N1"],
+                "target": "N3",
+            }
+        )
+        plans = [
+            # producing an initial source again must not delay it
+            [(0, []), (1, ["Subtask1"]), (2, ["Subtask2"])],
+            [(0, []), (3, ["Subtask1"])],
+            [(0, []), (3, ["Subtask1"]), (2, [])],
+            [(2, [])],
+        ]
+        plans = [
+            [{"name": f"Subtask{i + 1}", "perform_rule_indx": rule, "dependencies": deps} for i, (rule, deps) in enumerate(plan)]
+            for plan in plans
+        ]
+
+        scores = env.evaluate_plans(plans)
+
+        for plan, score in zip(plans, scores):
+            for task in plan:
+                env.commit(SubTTNode(task))
+            self.assertEqual((score["makespan"], score["cost"]), env.get_final_result())
+            env.reset()
+        self.assertEqual(scores[0]["makespan"], 1)
+
+    def test_rollback_restores_checkpointed_state(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 6, "cost": 1},
+                    {"source": ["N1"], "target": ["N2"], "time": 2, "cost": 3},
+                    {"source": ["N2"], "target": ["N3"], "time": 1, "cost": 1},
+                ],
+                "initial_source": ["N1"],
+                "target": "N3",
+            }
+        )
+        env.commit(SubTTNode({"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}))
+        root = env.checkpoint()
+
+        env.commit(SubTTNode({"name": "Subtask2", "perform_rule_indx": 1, "dependencies": []}))
+        branch = env.checkpoint()
+        env.commit(SubTTNode({"name": "Subtask3", "perform_rule_indx": 2, "dependencies": []}))
+        self.assertEqual(env.get_final_result(), (3, 5))
+
+        env.rollback(branch)
+        self.assertEqual(env.get_final_result(), (None, 4))
+        env.rollback(root)
+        self.assertEqual(env.material_earliest_time, {"N1": 0, "N2": 6})
+        self.assertEqual(env.total_cost, 1)
+        self.assertEqual(env.log.count("committed"), 1)
+
+        env.commit(SubTTNode({"name": "Subtask3", "perform_rule_indx": 2, "dependencies": []}))
+        self.assertEqual(env.get_final_result(), (7, 2))
+        with self.assertRaises(ValueError):
+            env.rollback(branch)
+        env.rollback(root)
+        env.reset()
+        with self.assertRaises(ValueError):
+            env.rollback(root)
+
+    def test_undo_log_is_only_kept_while_a_checkpoint_is_held(self):
+        env = TTEnv(
+            {
+                "rules": [
+                    {"source": ["N1"], "target": ["N2"], "time": 6, "cost": 1},
+                    {"source": ["N1"], "target": ["N2"], "time": 2, "cost": 3},
+                ],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        env.commit(SubTTNode({"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}))
+        env.commit(SubTTNode({"name": "Subtask2", "perform_rule_indx": 1, "dependencies": []}))
+        self.assertEqual(env._undo, [])
+
+        env.reset()
+        env.commit(SubTTNode({"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}))
+        root = env.checkpoint()
+        nested = env.checkpoint()
+        env.commit(SubTTNode({"name": "Subtask2", "perform_rule_indx": 1, "dependencies": []}))
+        env.release(nested)
+        self.assertEqual(len(env._undo), 1)
+        env.release(root)
+        self.assertEqual(env._undo, [])
+        self.assertEqual(env.get_final_result(), (2, 4))
+        with self.assertRaises(ValueError):
+            env.rollback(root)
+
+    def test_commit_journal_is_bounded_and_renders_lazily(self):
+        env = TTEnv(
+            {
+                "rules": [{"source": ["N1"], "target": ["N2"], "time": 2, "cost": 1}],
+                "initial_source": ["N1"],
+                "target": "N2",
+            },
+            journal_size=3,
+        )
+        for i in range(5):
+            env.commit(SubTTNode({"name": f"Subtask{i}", "perform_rule_indx": 0, "dependencies": []}))
+
+        self.assertEqual([record.name for record in env.journal], ["Subtask2", "Subtask3", "Subtask4"])
+        self.assertEqual(env.journal[-1], CommitRecord("Subtask4", 2, 2))
+        self.assertEqual(env.log.splitlines()[0], "Subtask2 successfully committed. Time: 2, Current time: 2")
+
+    def test_commits_are_not_logged_by_default(self):
+        env = TTEnv(
+            {
+                "rules": [{"source": ["N1"], "target": ["N2"], "time": 2, "cost": 1}],
+                "initial_source": ["N1"],
+                "target": "N2",
+            }
+        )
+        node = {"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}
+
+        # assertNoLogs would lower the logger's level, so collect records with a plain handler
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        commit_logger.addHandler(handler)
+        try:
+            env.commit(SubTTNode(node))
+            self.assertEqual(records, [])
+            with self.assertLogs(commit_logger, logging.DEBUG) as logs:
+                env.commit(SubTTNode(node))
+        finally:
+            commit_logger.removeHandler(handler)
+        self.assertIn("Subtask1 successfully committed", logs.output[0])
+
+    def test_env_factory_caches_parsed_rules_and_isolates_attempts(self):
+        config = {
+            "rules": [{"source": ["N1"], "target": ["N2"], "time": 2, "cost": 1}],
+            "initial_source": ["N1"],
+            "target": "N2",
+        }
+        factory = TTEnvFactory()
+
+        first = factory.create(config, question_id=7)
+        first.commit(SubTTNode({"name": "Subtask1", "source": ["N1"], "target": ["N2"], "dependencies": []}))
+        # explicit materials are interned per env, not into the shared tables
+        first.commit(SubTTNode({"name": "Subtask2", "perform_rule_indx": 0, "source": ["N1"], "target": ["N9"], "dependencies": []}))
+        second = factory.create(config, question_id=7)
+        by_content = factory.create(json.dumps(config))
+
+        self.assertEqual((factory.hits, factory.misses), (1, 2))
+        self.assertIs(second.rules, first.rules)
+        self.assertEqual(first.get_final_result(), (2, 2))
+        self.assertEqual(second.get_final_result(), (None, 0))
+        self.assertNotIn("N9", second.material_ids)
+        self.assertEqual(by_content.evaluate_plans([[{"name": "Subtask1", "perform_rule_indx": 0, "dependencies": []}]])[0]["makespan"], 2)
+
     def test_commit_raises_when_source_not_available(self):
         env = TTEnv(
             {